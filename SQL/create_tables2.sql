@@ -11,6 +11,7 @@ CREATE TABLE products (
 
 --Market data
 --stores daily scraped prices and stock status
+--existing databases: run SQL/migrate_price_intervals.sql for valid_to/observations and the daily views
 CREATE TABLE market_data (
     id SERIAL PRIMARY KEY,
     product_id INTEGER REFERENCES products(id) ON DELETE CASCADE,
@@ -20,6 +21,10 @@ CREATE TABLE market_data (
     is_in_stock BOOLEAN DEFAULT TRUE,
     product_url TEXT,
     scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    --PRICE_STORAGE=intervals: the row is valid from scraped_at until valid_to
+    --(the last scrape that saw the same price and stock), over `observations` scrapes
+    valid_to TIMESTAMP,
+    observations INTEGER NOT NULL DEFAULT 1,
     UNIQUE(product_id, vendor_name, scraped_at)
 );
 
@@ -35,7 +40,84 @@ CREATE TABLE product_mappings (
 --Speed up price history search
 CREATE INDEX idx_vendor_date ON market_data(vendor_name, scraped_at);
 
+--Parsed laptop specs
+--filled by the product matcher, used to block candidate pairs
+CREATE TABLE product_specs (
+    product_id INTEGER PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+    brand VARCHAR(50),
+    cpu_family VARCHAR(20),
+    cpu_gen SMALLINT,
+    ram_gb SMALLINT,
+    storage_gb INTEGER,
+    gpu VARCHAR(20)
+);
+
+--Scrape telemetry
+--one row per harvest run, one row per URL with its step timings
+CREATE TABLE scrape_runs (
+    id SERIAL PRIMARY KEY,
+    run_key VARCHAR(64) NOT NULL,
+    kind VARCHAR(20),
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    items INTEGER,
+    saved INTEGER,
+    failed INTEGER
+);
+
+CREATE TABLE scrape_events (
+    id BIGSERIAL PRIMARY KEY,
+    run_id INTEGER REFERENCES scrape_runs(id) ON DELETE CASCADE,
+    vendor_name VARCHAR(100),
+    url TEXT,
+    outcome VARCHAR(20),
+    bytes INTEGER,
+    queue_wait_ms REAL,
+    polite_delay_ms REAL,
+    retry_wait_ms REAL,
+    fetch_ms REAL,
+    render_wait_ms REAL,
+    parse_ms REAL,
+    db_write_ms REAL,
+    total_ms REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_scrape_events_run_vendor ON scrape_events(run_id, vendor_name);
+
+--Daily price series
+--expands every market_data row over the days it was valid, so interval rows and
+--one-row-per-scrape history read the same; scraped_at is the exact scrape time on
+--a row's first day and midnight on the days it was carried forward
+CREATE VIEW market_data_daily AS
+SELECT m.product_id,
+       m.vendor_name,
+       d.day::date AS day,
+       CASE WHEN d.day::date = DATE(m.scraped_at) THEN m.scraped_at ELSE d.day END AS scraped_at,
+       m.price,
+       m.is_in_stock
+FROM market_data m
+CROSS JOIN LATERAL generate_series(DATE(m.scraped_at)::timestamp, DATE(COALESCE(m.valid_to, m.scraped_at))::timestamp,
+                                   INTERVAL '1 day') AS d(day);
+
+--Daily price rollup
+--one row per product, vendor and day; refreshed by the daemon's rollups job
+CREATE MATERIALIZED VIEW daily_prices AS
+SELECT product_id,
+       vendor_name,
+       day,
+       AVG(price) AS avg_price,
+       MIN(price) AS min_price,
+       MAX(price) AS max_price,
+       BOOL_OR(is_in_stock) AS in_stock,
+       COUNT(*) AS samples
+FROM market_data_daily
+GROUP BY product_id, vendor_name, day;
+
+--unique index required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX idx_daily_prices_key ON daily_prices(product_id, vendor_name, day);
+
 --Verify created tables
 SELECT * FROM products
 SELECT * FROM market_data
-SELECT * FROM product_mappings
\ No newline at end of file
+SELECT * FROM product_mappings
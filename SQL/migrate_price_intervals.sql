@@ -0,0 +1,40 @@
+--Migration for databases created before change-only price storage
+--adds the interval columns, the daily expansion view and the daily rollup on top of it
+--safe to run more than once:
+--  psql -d marketpulse -f SQL/migrate_price_intervals.sql
+--run it before setting PRICE_STORAGE=intervals or deploying code that reads market_data_daily
+BEGIN;
+
+ALTER TABLE market_data
+    ADD COLUMN IF NOT EXISTS valid_to TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS observations INTEGER NOT NULL DEFAULT 1;
+
+--daily_prices depends on market_data_daily, so it is rebuilt around the view
+DROP MATERIALIZED VIEW IF EXISTS daily_prices;
+
+CREATE OR REPLACE VIEW market_data_daily AS
+SELECT m.product_id,
+       m.vendor_name,
+       d.day::date AS day,
+       CASE WHEN d.day::date = DATE(m.scraped_at) THEN m.scraped_at ELSE d.day END AS scraped_at,
+       m.price,
+       m.is_in_stock
+FROM market_data m
+CROSS JOIN LATERAL generate_series(DATE(m.scraped_at)::timestamp, DATE(COALESCE(m.valid_to, m.scraped_at))::timestamp,
+                                   INTERVAL '1 day') AS d(day);
+
+CREATE MATERIALIZED VIEW daily_prices AS
+SELECT product_id,
+       vendor_name,
+       day,
+       AVG(price) AS avg_price,
+       MIN(price) AS min_price,
+       MAX(price) AS max_price,
+       BOOL_OR(is_in_stock) AS in_stock,
+       COUNT(*) AS samples
+FROM market_data_daily
+GROUP BY product_id, vendor_name, day;
+
+CREATE UNIQUE INDEX idx_daily_prices_key ON daily_prices(product_id, vendor_name, day);
+
+COMMIT;
@@ -0,0 +1,141 @@
+"""
+Torch vs int8 ONNX embedding backends for ProductMatcher.
+
+Each backend runs in its own subprocess so cold start and peak RSS are
+measured in isolation, then the two embedding sets are compared for
+matching agreement at the matcher's 0.85 threshold.
+
+    python benchmarks/bench_embeddings.py                 # names from product_mappings
+    python benchmarks/bench_embeddings.py --synthetic 5000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+THRESHOLD = 0.85
+
+
+def synthetic_names(count, seed=7):
+    rng = random.Random(seed)
+    brands = ["ASUS TUF", "ASUS Vivobook", "Lenovo IdeaPad", "Lenovo LOQ", "HP Victus", "Dell Inspiron", "MSI Katana", "Acer Nitro"]
+    cpus = ["i5-12450H", "i7-13620H", "Ryzen 5 7535HS", "Ryzen 7 7840HS", "i3-1215U"]
+    gpus = ["RTX 4050", "RTX 4060", "RTX 3050", "Iris Xe", "Radeon Graphics"]
+    return [f"{rng.choice(brands)} {rng.randint(14, 17)} {rng.choice(cpus)} {rng.choice([8, 16, 32])}GB "
+            f"{rng.choice([256, 512, 1024])}GB SSD {rng.choice(gpus)}" for _ in range(count)]
+
+
+def database_names():
+    from src.database.db_manager import DatabaseManager
+    conn = DatabaseManager().get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT external_name_variant FROM product_mappings")
+            return [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+#runs inside the subprocess: load one backend, encode, report timings
+def run_worker(backend, names_path, out_path, repeats):
+    import numpy as np
+
+    with open(names_path, encoding="utf-8") as f:
+        names = [line.rstrip("\n") for line in f]
+
+    start = time.perf_counter()
+    from src.ai.product_matcher import ProductMatcher
+    model = ProductMatcher.load_encoder(MODEL_NAME, backend)
+    cold_start = time.perf_counter() - start
+
+    model.encode(names[:32], convert_to_numpy=True)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings = model.encode(names, convert_to_numpy=True)
+        timings.append(time.perf_counter() - start)
+
+    np.save(out_path, np.asarray(embeddings, dtype=np.float32))
+    best = min(timings)
+    print(json.dumps({
+        "backend": backend,
+        "names": len(names),
+        "cold_start_s": round(cold_start, 3),
+        "encode_s": round(best, 3),
+        "names_per_s": round(len(names) / best, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+def pairs_above(embeddings, limit=5000):
+    import numpy as np
+    vectors = embeddings[:limit]
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    sims = vectors @ vectors.T
+    i, j = np.nonzero(np.triu(sims > THRESHOLD, k=1))
+    return set(zip(i.tolist(), j.tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, help="use N generated names instead of the database")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--worker", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--names-file", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.names_file, args.out, args.repeats)
+        return
+
+    import numpy as np
+    names = synthetic_names(args.synthetic) if args.synthetic else database_names()
+    print(f"⏱️ Benchmarking {len(names)} names, best of {args.repeats}")
+
+    results, embeddings = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        names_path = os.path.join(tmp, "names.txt")
+        with open(names_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(name.replace("\n", " ") for name in names))
+
+        for backend in ("torch", "onnx"):
+            out_path = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run([sys.executable, __file__, "--worker", backend, "--names-file", names_path,
+                                   "--out", out_path, "--repeats", str(args.repeats)],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"❌ {backend} failed:\n{proc.stderr[-2000:]}")
+                continue
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            embeddings[backend] = np.load(out_path)
+
+    for row in results:
+        print(f"   {row['backend']:>5}: cold start {row['cold_start_s']}s | {row['names_per_s']} names/s | "
+              f"peak RSS {row['peak_rss_mb']} MB")
+
+    if len(embeddings) == 2:
+        a, b = embeddings["torch"], embeddings["onnx"]
+        a = a / np.linalg.norm(a, axis=1, keepdims=True)
+        b = b / np.linalg.norm(b, axis=1, keepdims=True)
+        cosine = float(np.mean(np.sum(a * b, axis=1)))
+        pairs_a, pairs_b = pairs_above(a), pairs_above(b)
+        union = pairs_a | pairs_b
+        agreement = len(pairs_a & pairs_b) / len(union) if union else 1.0
+        print(f"   agreement: mean cosine(torch, onnx) {cosine:.4f} | "
+              f"match pairs > {THRESHOLD}: torch {len(pairs_a)}, onnx {len(pairs_b)}, jaccard {agreement:.3f}")
+        results.append({"mean_cosine": round(cosine, 4), "pair_jaccard": round(agreement, 4)})
+
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
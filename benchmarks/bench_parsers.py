@@ -0,0 +1,78 @@
+"""
+Parser throughput over the offline snapshot archive.
+
+Every archived product page is run through its scraper's parse_product
+with no network access. Results are reported per vendor as pages/s,
+p50/p95 ms per page and MB/s. Pages are recorded with
+SNAPSHOT_MODE=record python main.py.
+
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py --vendor Nanotek --repeat 5 --json parsers.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+from src.scrapers.snapshots import SNAPSHOT_DIR, SnapshotStore, load_scraper
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help="snapshot archive directory")
+    parser.add_argument("--vendor", help="only benchmark this vendor")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the archive (best pass is reported)")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.root)
+    #decompress up front so only parsing is timed
+    pages = {}
+    for entry in store.entries(args.vendor):
+        pages.setdefault(entry['scraper'], []).append((entry['url'], store.load(entry['sha256'])))
+    if not pages:
+        print(f"⚠️ No snapshots in {args.root}")
+        sys.exit(1)
+
+    results = {}
+    for target, vendor_pages in sorted(pages.items()):
+        scraper = load_scraper(target)
+        total_bytes = sum(len(html.encode('utf-8')) for _, html in vendor_pages)
+        best, best_times = None, None
+        for _ in range(args.repeat):
+            times = []
+            start = time.perf_counter()
+            for url, html in vendor_pages:
+                page_start = time.perf_counter()
+                scraper.parse_product(html, url)
+                times.append(time.perf_counter() - page_start)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best, best_times = elapsed, times
+
+        results[scraper.vendor_name] = {
+            "pages": len(vendor_pages),
+            "pages_per_second": round(len(vendor_pages) / best, 1),
+            "p50_ms": round(percentile(best_times, 50) * 1000, 2),
+            "p95_ms": round(percentile(best_times, 95) * 1000, 2),
+            "mb_per_second": round(total_bytes / best / 1e6, 2),
+        }
+        r = results[scraper.vendor_name]
+        print(f"✅ {scraper.vendor_name}: {r['pages']} pages, {r['pages_per_second']} pages/s, "
+              f"p50 {r['p50_ms']} ms, p95 {r['p95_ms']} ms, {r['mb_per_second']} MB/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
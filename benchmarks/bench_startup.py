@@ -0,0 +1,101 @@
+"""
+Startup regression check for the Flask app and the harvest CLI.
+
+Each target is imported in a fresh interpreter. The check records import
+time and RSS and lists any heavy dependency that got pulled in at import.
+It exits non-zero when a target goes over its budget or imports
+something it should load lazily.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+HEAVY_MODULES = ["xgboost", "pandas", "numpy", "sklearn", "torch", "sentence_transformers",
+                 "selenium", "webdriver_manager"]
+
+#target -> (code run in the child, budgets)
+TARGETS = {
+    "flask_app": (
+        "import src.flask_app.app",
+        {"max_seconds": 2.0, "max_rss_mb": 150, "forbidden": HEAVY_MODULES},
+    ),
+    "main_cli": (
+        "import main",
+        {"max_seconds": 1.0, "max_rss_mb": 100, "forbidden": HEAVY_MODULES},
+    ),
+    "barclays_scraper": (
+        "import main; main.get_scraper_for_url('https://www.barclays.lk/items.asp')",
+        {"max_seconds": 1.5, "max_rss_mb": 120, "forbidden": ["selenium", "webdriver_manager"]},
+    ),
+}
+
+#prefixes the child's result line, so anything the target prints at import is ignored
+SENTINEL = "@@bench_startup@@ "
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print({sentinel!r} + json.dumps({{
+    "seconds": round(elapsed, 3),
+    "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}), flush=True)
+"""
+
+
+def measure(code):
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run([sys.executable, "-c", PROBE.format(code=code, heavy=HEAVY_MODULES, sentinel=SENTINEL)],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(SENTINEL):
+            return json.loads(line[len(SENTINEL):])
+    return {"error": "no result from child"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results, failed = {}, False
+    for name, (code, budget) in TARGETS.items():
+        result = measure(code)
+        problems = []
+        if "error" in result:
+            problems.append(result["error"])
+        else:
+            if result["seconds"] > budget["max_seconds"]:
+                problems.append(f"import took {result['seconds']}s > {budget['max_seconds']}s")
+            if result["rss_mb"] > budget["max_rss_mb"]:
+                problems.append(f"RSS {result['rss_mb']} MB > {budget['max_rss_mb']} MB")
+            eager = [m for m in result["loaded"] if m in budget["forbidden"]]
+            if eager:
+                problems.append(f"imported eagerly: {', '.join(eager)}")
+
+        result["problems"] = problems
+        results[name] = result
+        failed = failed or bool(problems)
+        status = "❌" if problems else "✅"
+        print(f"{status} {name}: {result.get('seconds', '-')}s, {result.get('rss_mb', '-')} MB"
+              + (f" | {'; '.join(problems)}" if problems else ""))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
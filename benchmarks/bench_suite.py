@@ -0,0 +1,295 @@
+"""
+End-to-end benchmarks on synthetic data in a scratch Postgres database.
+
+For each size (10k / 100k / 1m market_data rows) the suite creates a
+throwaway database next to the configured one (same DB_HOST/DB_PORT/
+DB_USER). It loads SQL/create_tables2.sql and bulk-loads a synthetic
+catalogue with multi-year histories (benchmarks/synthetic.py). Then it
+measures, in a fresh interpreter per size:
+
+  ingest     DatabaseManager.save_scraped_data / save_scraped_batch items per second
+  routes     dashboard() and price_explorer() through the Flask test client
+  predictor  PricePredictor single / bulk / group forecast latency
+  matcher    ProductMatcher.find_matches(dry_run=True), cold and warm embedding cache
+             (skipped when no embedding backend is installed)
+
+Results are written as JSON together with the commit they were measured
+on. --compare prints the change against an earlier result file.
+
+    python benchmarks/bench_suite.py --sizes 10k,100k --json bench.json
+    python benchmarks/bench_suite.py --sizes 10k --only ingest,routes --compare bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BENCHES = ("ingest", "routes", "predictor", "matcher")
+ROUTE_REPEAT = 10
+EXPLORER_QUERIES = ["", "rtx 4060", "asus vivobook", "ryzen 7 16gb", "thinkpad"]
+
+
+def timing(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {"n": len(ordered), "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "p50_ms": round(pick(0.5) * 1000, 2), "p95_ms": round(pick(0.95) * 1000, 2)}
+
+
+def timed(fn, *args, repeat=1, quiet=True):
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            result = fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+#scratch database setup (parent process)
+def admin_connection():
+    import psycopg2
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(ROOT, ".env"))
+    conn = psycopg2.connect(host=os.getenv("DB_HOST", "127.0.0.1"), port=os.getenv("DB_PORT", "5433"),
+                            user=os.getenv("DB_USER", "postgres"), password=os.getenv("DB_PASSWORD"),
+                            dbname=os.getenv("BENCH_ADMIN_DB", "postgres"))
+    conn.autocommit = True
+    return conn
+
+
+def schema_statements():
+    with open(os.path.join(ROOT, "SQL", "create_tables2.sql")) as f:
+        ddl = f.read().split("--Verify created tables")[0]
+    return [s.strip() for s in ddl.split(";") if s.strip()]
+
+
+def create_scratch_db(name, rows, seed):
+    import psycopg2
+    from benchmarks.synthetic import generate
+
+    admin = admin_connection()
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{name}"')
+        cur.execute(f'CREATE DATABASE "{name}"')
+    admin.close()
+
+    data = generate(rows, seed=seed)
+    conn = psycopg2.connect(host=os.getenv("DB_HOST", "127.0.0.1"), port=os.getenv("DB_PORT", "5433"),
+                            user=os.getenv("DB_USER", "postgres"), password=os.getenv("DB_PASSWORD"), dbname=name)
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        for statement in schema_statements():
+            cur.execute(statement)
+        _copy(cur, "products (id, name, category)", ((pid, name, "Laptop") for pid, name in data["products"]))
+        _copy(cur, "product_mappings (internal_product_id, external_name_variant, vendor_name)", data["mappings"])
+        md = data["market_data"]
+        _copy(cur, "market_data (product_id, vendor_name, price, is_in_stock, product_url, scraped_at)",
+              zip(md["product_id"], md["vendor"], md["price"], md["is_in_stock"], md["url"], md["scraped_at"]))
+        cur.execute("SELECT setval('products_id_seq', (SELECT MAX(id) FROM products))")
+        cur.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return {"rows": rows, "products": len(data["products"]), "mappings": len(data["mappings"]),
+            "load_seconds": round(time.perf_counter() - start, 2)}
+
+
+def _copy(cur, target, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(str(v).replace("\t", " ") for v in row) + "\n")
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {target} FROM STDIN", buffer)
+
+
+def drop_scratch_db(name):
+    admin = admin_connection()
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{name}"')
+    admin.close()
+
+
+#benchmarks (child process, DB_NAME already points at the scratch database)
+def bench_ingest():
+    from benchmarks.synthetic import new_listings
+    from src.database.db_manager import DatabaseManager
+
+    db = DatabaseManager()
+    conn = db.get_connection()
+    with conn.cursor() as cur:
+        cur.execute("SELECT external_name_variant, vendor_name FROM product_mappings LIMIT 200")
+        known = [{"name": n, "vendor": v, "price": 250000.0, "is_in_stock": True, "url": "https://bench/known"}
+                 for n, v in cur.fetchall()]
+    conn.close()
+
+    results = {}
+    items = new_listings(200, seed=1) + known
+    samples, _ = timed(lambda: [db.save_scraped_data(item) for item in items])
+    results["save_scraped_data"] = {"items": len(items), "items_per_second": round(len(items) / samples[0], 1)}
+
+    items = new_listings(200, seed=2) + known
+    batches = [items[i:i + 25] for i in range(0, len(items), 25)]
+    samples, _ = timed(lambda: [db.save_scraped_batch(batch) for batch in batches])
+    results["save_scraped_batch_25"] = {"items": len(items), "items_per_second": round(len(items) / samples[0], 1)}
+    db.close()
+    return results
+
+
+def bench_routes():
+    samples, module = timed(lambda: __import__("src.flask_app.app", fromlist=["app"]))
+    client = module.app.test_client()
+    results = {"import": timing(samples)}
+
+    def get(path):
+        response = client.get(path)
+        assert response.status_code == 200, f"{path} -> {response.status_code}"
+
+    get("/")
+    results["dashboard"] = timing(timed(get, "/", repeat=ROUTE_REPEAT)[0])
+    for query in EXPLORER_QUERIES:
+        path = f"/explorer?q={query}" if query else "/explorer"
+        get(path)
+        results[f"explorer[{query or 'feed'}]"] = timing(timed(get, path, repeat=ROUTE_REPEAT)[0])
+    return results
+
+
+def _busiest_products(limit):
+    from src.database.db_manager import DatabaseManager
+    conn = DatabaseManager().get_connection()
+    with conn.cursor() as cur:
+        cur.execute("SELECT product_id FROM market_data GROUP BY product_id ORDER BY COUNT(*) DESC LIMIT %s", (limit,))
+        ids = [r[0] for r in cur.fetchall()]
+    conn.close()
+    return ids
+
+
+def bench_predictor():
+    from src.ai.price_predictor import PricePredictor
+
+    predictor = PricePredictor(mode='local')
+    ids = _busiest_products(50)
+    results = {"single": timing([timed(predictor.predict_single, pid)[0][0] for pid in ids[:20]])}
+    results["many_50"] = timing(timed(predictor.predict_many, ids, repeat=3)[0])
+    results["group_20"] = timing(timed(predictor.predict_group, ids[:20], repeat=3)[0])
+    return results
+
+
+def bench_matcher():
+    try:
+        from src.ai.product_matcher import ProductMatcher
+        samples, matcher = timed(ProductMatcher)
+    except ImportError as e:
+        return {"skipped": f"no embedding backend: {e}"}
+    results = {"load_model": timing(samples)}
+    results["find_matches_cold"] = timing(timed(matcher.find_matches, True)[0])
+    results["find_matches_warm"] = timing(timed(matcher.find_matches, True, repeat=3)[0])
+    return results
+
+
+def run_child(benches, out_path):
+    results = {}
+    for name in benches:
+        start = time.perf_counter()
+        try:
+            results[name] = globals()[f"bench_{name}"]()
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        print(f"   {'❌' if 'error' in results[name] else '✅'} {name} ({time.perf_counter() - start:.1f}s)",
+              file=sys.stderr)
+    with open(out_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def git_meta():
+    def git(*args):
+        proc = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True)
+        return proc.stdout.strip() if proc.returncode == 0 else None
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+#flattens {size: {bench: {case: {metric: value}}}} to "size/bench/case/metric" -> value
+def flatten(results):
+    flat = {}
+    for size, benches in results.items():
+        for bench, cases in benches.items():
+            for case, metrics in cases.items():
+                if isinstance(metrics, dict):
+                    for metric, value in metrics.items():
+                        if isinstance(value, (int, float)) and metric not in ("n", "items"):
+                            flat[f"{size}/{bench}/{case}/{metric}"] = value
+    return flat
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    print(f"\n🔍 vs {baseline['meta'].get('commit', '?')[:10]}")
+    for key in sorted(set(old) & set(new)):
+        if not old[key]:
+            continue
+        ratio = new[key] / old[key]
+        #lower is better for times, higher for throughput
+        worse = ratio > 1.1 if key.endswith("_ms") else ratio < 0.9
+        better = ratio < 0.9 if key.endswith("_ms") else ratio > 1.1
+        mark = "⚠️" if worse else ("🚀" if better else "  ")
+        print(f"   {mark} {key}: {old[key]} -> {new[key]} ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,100k", help=f"comma separated, from {', '.join(SIZES)}")
+    parser.add_argument("--only", help=f"comma separated subset of {', '.join(BENCHES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch databases")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against an earlier --json file")
+    parser.add_argument("--child", nargs=2, metavar=("BENCHES", "OUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0].split(","), args.child[1])
+        return
+
+    benches = args.only.split(",") if args.only else list(BENCHES)
+    report = {"meta": {**git_meta(), "python": platform.python_version(), "platform": platform.platform(),
+                       "cpus": os.cpu_count(), "timestamp": time.time(), "seed": args.seed},
+              "datasets": {}, "results": {}}
+
+    for size in args.sizes.split(","):
+        db_name = f"marketpulse_bench_{size}_{os.getpid()}"
+        print(f"📦 {size}: loading {SIZES[size]:,} rows into {db_name}")
+        report["datasets"][size] = create_scratch_db(db_name, SIZES[size], args.seed)
+        try:
+            with tempfile.TemporaryDirectory() as scratch:
+                out = os.path.join(scratch, "results.json")
+                env = dict(os.environ, DB_NAME=db_name, PYTHONPATH=ROOT, FORECAST_MODE="local",
+                           EMBEDDING_CACHE_DIR=os.path.join(scratch, "embeddings"))
+                subprocess.run([sys.executable, __file__, "--child", ",".join(benches), out],
+                               cwd=ROOT, env=env, check=True)
+                with open(out) as f:
+                    report["results"][size] = json.load(f)
+        finally:
+            if not args.keep:
+                drop_scratch_db(db_name)
+
+    print(json.dumps(report["results"], indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Synthetic vendors, laptop listings and multi-year price histories.
+
+Each product is sold by one to three vendors under a vendor-specific
+spelling of its name, so the matcher has real cross-vendor duplicates
+to find. Prices follow a random walk with occasional step changes.
+Stock status flips now and then.
+
+    from benchmarks.synthetic import generate
+    data = generate(rows=100_000, seed=0)
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+VENDORS = ["Nanotek", "Barclays", "MSK Computers", "SL Techie"]
+
+SERIES = {
+    "ASUS": ["VivoBook 15", "TUF Gaming F15", "ROG Strix G16", "ZenBook 14"],
+    "Lenovo": ["IdeaPad Slim 3", "LOQ 15IAX9", "Legion 5 Pro", "ThinkPad E14"],
+    "HP": ["Victus 15", "Pavilion 14", "OMEN 16", "EliteBook 840"],
+    "Dell": ["Inspiron 3520", "Vostro 3530", "Latitude 5440", "Alienware m16"],
+    "Acer": ["Aspire 5", "Nitro V 15", "Predator Helios Neo", "Swift Go 14"],
+    "MSI": ["Modern 15", "Thin GF63", "Katana 15", "Cyborg 15"],
+}
+CPUS = ["Core i3-1215U", "Core i5-12450H", "Core i5-13420H", "Core i7-13620H",
+        "Ryzen 5 7535HS", "Ryzen 7 7840HS", "Core Ultra 7 155H"]
+RAM = [8, 16, 32]
+STORAGE = [256, 512, 1024]
+GPUS = [None, "RTX 3050", "RTX 4050", "RTX 4060", "RTX 4070"]
+
+#scrapes per listing; histories span up to YEARS regardless of size
+ROWS_PER_LISTING = 200
+YEARS = 3
+
+
+def _product_specs(rng, count):
+    brands = list(SERIES)
+    specs = []
+    for _ in range(count):
+        brand = brands[rng.integers(len(brands))]
+        specs.append({
+            "brand": brand,
+            "series": SERIES[brand][rng.integers(4)],
+            "cpu": CPUS[rng.integers(len(CPUS))],
+            "ram": RAM[rng.integers(len(RAM))],
+            "storage": STORAGE[rng.integers(len(STORAGE))],
+            "gpu": GPUS[rng.integers(len(GPUS))],
+        })
+    return specs
+
+
+#same laptop, spelled the way each vendor tends to list it
+def vendor_name(spec, vendor):
+    gpu = f" {spec['gpu']}" if spec["gpu"] else ""
+    storage = f"{spec['storage'] // 1024}TB" if spec["storage"] >= 1024 else f"{spec['storage']}GB"
+    if vendor == "Nanotek":
+        return f"{spec['brand']} {spec['series']} {spec['cpu']} {spec['ram']}GB {storage} SSD{gpu}"
+    if vendor == "Barclays":
+        return f"{spec['brand'].upper()} {spec['series'].upper()} - {spec['cpu']} / {spec['ram']}GB RAM / {storage} NVME{gpu}"
+    if vendor == "MSK Computers":
+        return f"{spec['brand']} {spec['series']} ({spec['cpu']}, {spec['ram']}GB, {storage}{gpu and ',' + gpu})"
+    return f"{spec['series']} {spec['cpu']} {spec['ram']}GB DDR5 {storage} SSD{gpu} Laptop"
+
+
+def _base_price(spec):
+    price = 120_000 + spec["ram"] * 4_000 + spec["storage"] * 40
+    price += {"Core i3": 0, "Core i5": 60_000, "Core i7": 140_000, "Ryzen 5": 50_000,
+              "Ryzen 7": 120_000, "Core Ul": 180_000}[spec["cpu"][:7]]
+    price += {None: 0, "RTX 3050": 60_000, "RTX 4050": 110_000, "RTX 4060": 160_000, "RTX 4070": 260_000}[spec["gpu"]]
+    return price
+
+
+#returns products [(id, name)], mappings [(product_id, name, vendor)] and
+#market_data columns as numpy arrays (product_id, vendor, price, is_in_stock, url, scraped_at)
+def generate(rows, seed=0, end=None):
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now().replace(microsecond=0)
+    listings_needed = max(8, rows // ROWS_PER_LISTING)
+
+    products, mappings, listings = [], [], []
+    product_id = 0
+    while len(listings) < listings_needed:
+        product_id += 1
+        spec = _product_specs(rng, 1)[0]
+        vendors = rng.choice(VENDORS, size=rng.integers(1, 4), replace=False)
+        products.append((product_id, vendor_name(spec, vendors[0])))
+        base = _base_price(spec)
+        for vendor in vendors:
+            mappings.append((product_id, vendor_name(spec, vendor), str(vendor)))
+            listings.append((product_id, str(vendor), base * rng.uniform(0.95, 1.05)))
+    listings = listings[:listings_needed]
+
+    #split the row budget over listings, each spanning up to YEARS
+    lengths = np.full(len(listings), rows // len(listings))
+    lengths[: rows - lengths.sum()] += 1
+    span_days = YEARS * 365
+    #the final scrape of every listing lands within the day before `end`
+    origin = np.datetime64(end - timedelta(days=span_days), 'm')
+
+    columns = {k: [] for k in ("product_id", "vendor", "price", "is_in_stock", "url", "scraped_at")}
+    for (pid, vendor, base), n in zip(listings, lengths):
+        if n == 0:
+            continue
+        #at most one scrape per listing per day, the last one on the final day
+        start_offset = rng.integers(0, span_days // 3)
+        step = max(1.0, (span_days - 1 - start_offset) / max(1, n - 1))
+        days = np.round(span_days - 1 - np.arange(n)[::-1] * step).astype(int)
+        minutes = rng.integers(0, 12 * 60, n)
+        stamps = origin + days.astype('timedelta64[D]') + minutes.astype('timedelta64[m]')
+
+        #mostly flat, small drift, rare promotions and price revisions
+        changes = rng.random(n) < 0.15
+        moves = np.where(changes, rng.normal(0, 0.02, n), 0.0)
+        moves[rng.random(n) < 0.01] += rng.normal(-0.08, 0.05)
+        prices = np.round(base * np.exp(np.cumsum(moves)), -2)
+
+        in_stock = np.ones(n, dtype=bool)
+        flips = np.flatnonzero(rng.random(n) < 0.03)
+        for f in flips:
+            in_stock[f:f + rng.integers(1, 10)] = False
+
+        columns["product_id"].append(np.full(n, pid))
+        columns["vendor"].append(np.full(n, vendor, dtype=object))
+        columns["price"].append(prices)
+        columns["is_in_stock"].append(in_stock)
+        columns["url"].append(np.full(n, f"https://{vendor.lower().replace(' ', '')}.example/p/{pid}", dtype=object))
+        columns["scraped_at"].append(stamps)
+
+    market_data = {k: np.concatenate(v) for k, v in columns.items()}
+    return {"products": products, "mappings": mappings, "market_data": market_data}
+
+
+#unseen product names in vendor spellings, for ingest benchmarks
+def new_listings(count, seed=1):
+    rng = np.random.default_rng(seed)
+    items = []
+    for i, spec in enumerate(_product_specs(rng, count)):
+        vendor = VENDORS[i % len(VENDORS)]
+        items.append({
+            "name": f"{vendor_name(spec, vendor)} #{seed}-{i}",
+            "price": float(round(_base_price(spec) * rng.uniform(0.95, 1.05), -2)),
+            "vendor": vendor,
+            "is_in_stock": bool(rng.random() > 0.1),
+            "url": f"https://{vendor.lower().replace(' ', '')}.example/new/{seed}-{i}",
+        })
+    return items
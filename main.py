@@ -1,10 +1,30 @@
+import os
+import sys
 import yaml
+import time
+import argparse
+import importlib
 from urllib.parse import urlparse
 from src.database.db_manager import DatabaseManager
-from src.scrapers.nanotek_scraper import NanotekScraper
-from src.scrapers.barclays_scraper import BarclaysScraper
-from src.scrapers.msk_scraper import MSKScraper
-from src.scrapers.sltechie_scraper import SLTechieScraper
+from src.monitoring.progress import ProgressPublisher
+from src.monitoring.telemetry import RunRecorder
+from src.pipeline.harvest_pipeline import HarvestPipeline
+from src.pipeline.daemon import Daemon, Job, RunLock
+
+SCHEDULE_FILE = os.getenv("DAEMON_SCHEDULE_FILE", "config/schedule.yaml")
+#daemon: restart the browsers after this many harvests (0 keeps them for the process lifetime)
+BROWSER_RECYCLE_RUNS = int(os.getenv("DAEMON_BROWSER_RECYCLE_RUNS", "7"))
+#daemon: the forecasts job retrains the global model once it is older than this
+FORECAST_RETRAIN_HOURS = float(os.getenv("FORECAST_RETRAIN_HOURS", "20"))
+
+#domain -> "module:Class"
+#modules are imported on first use so the HTTP-only Barclays path never loads Selenium
+SCRAPER_REGISTRY = {
+    "nanotek.lk": "src.scrapers.nanotek_scraper:NanotekScraper",
+    "barclays.lk": "src.scrapers.barclays_scraper:BarclaysScraper",
+    "mskcomputers.lk": "src.scrapers.msk_scraper:MSKScraper",
+    "sltechie.lk": "src.scrapers.sltechie_scraper:SLTechieScraper",
+}
 
 #the pages we want to scrape
 TARGET_CATEGORIES = [
@@ -41,26 +61,64 @@ def load_markets():
         print(f"⚠️ Warning: Could not load markets.yaml: {e}")
         return {}
 
+#MATCH_ON_INGEST=1 links new products to existing ones while harvesting
+def build_ingest_matcher():
+    if os.getenv("MATCH_ON_INGEST", "0") != "1":
+        return None
+    try:
+        from src.ai.product_matcher import ProductMatcher
+        matcher = ProductMatcher()
+        matcher.load_index()
+        return matcher
+    except Exception as e:
+        print(f"⚠️ Ingest matcher unavailable, new products stay unlinked: {e}")
+        return None
+
+#ADAPTIVE_SCHEDULE=1 refreshes volatile listings often and stable ones rarely,
+#within a per-vendor page budget (see src/pipeline/scheduler.py)
+def build_scheduler(db):
+    if os.getenv("ADAPTIVE_SCHEDULE", "0") != "1":
+        return None
+    from src.pipeline.scheduler import RefreshScheduler
+    scheduler = RefreshScheduler(db)
+    try:
+        scheduler.load_stats()
+    except Exception as e:
+        print(f"⚠️ Adaptive schedule unavailable, scraping every product: {e}")
+        return None
+    return scheduler
+
+#SNAPSHOT_MODE=record archives every fetched product page (see src/scrapers/snapshots.py)
+def build_snapshot_store():
+    if os.getenv("SNAPSHOT_MODE", "off") != "record":
+        return None
+    from src.scrapers.snapshots import SnapshotStore
+    store = SnapshotStore()
+    print(f"📼 Recording product pages to {store.root}")
+    return store
+
 #return correct scraper based on url
-def get_scraper_for_url(url):
+#cache: optional dict of instances by vendor domain, reused across runs (the daemon keeps their browsers open)
+def get_scraper_for_url(url, cache=None):
     domain = urlparse(url).netloc.lower()
     
-    if "nanotek.lk" in domain:
-        return NanotekScraper()
-    elif "barclays.lk" in domain:
-        return BarclaysScraper()
-    elif "mskcomputers.lk" in domain:
-        return MSKScraper()
-    elif "sltechie.lk" in domain:
-        return SLTechieScraper()
-    else:
-        return None
+    for vendor_domain, target in SCRAPER_REGISTRY.items():
+        if vendor_domain in domain:
+            if cache is not None and vendor_domain in cache:
+                return cache[vendor_domain]
+            module_name, class_name = target.split(":")
+            scraper = getattr(importlib.import_module(module_name), class_name)()
+            if cache is not None:
+                cache[vendor_domain] = scraper
+            return scraper
+    return None
 
 #sorts url by vendor
 #scrapes data
 #save to database
 def run_pipeline(url_list):
-    db = DatabaseManager()
+    db = DatabaseManager(matcher=build_ingest_matcher())
+    progress = ProgressPublisher(db)
     
     #group urls by vendor
     batches = {}
@@ -79,84 +137,205 @@ def run_pipeline(url_list):
         else:
             print(f"⚠️ No scraper found for: {url}")
 
-    #Process each vendor batch
+    #one fetch thread per vendor, shared parse and write stages
     print(f"--- 2. Starting Execution ({len(batches)} Vendors Found) ---")
-    
+    progress.publish('run_started', total=len(url_list))
+
+    sources = {}
     for scraper_name, batch_data in batches.items():
-        scraper = batch_data["instance"]
         urls = batch_data["urls"]
-        
-        print(f"\n🔵 Starting {scraper_name} ({len(urls)} items)...")
-        
-        try: 
-            # the scraper classes handle self.setup_driver() internally now.
-            
-            for i, link in enumerate(urls, 1):
-                print(f"   ({i}/{len(urls)}) Scraping: {link}")
-                
-                #SCRAPE
-                data = scraper.scrape_product(link)
-                
-                #SAVE
-                if data:
-                    db.save_scraped_data(data)
-                else:
-                    print(f"   ❌ Failed to scrape data.")
-                    
-        finally:
-            #Close the browser after the batch is done
-            if hasattr(scraper, 'close_driver'):
-                scraper.close_driver()
+        print(f"🔵 Queued {scraper_name} ({len(urls)} items)")
+        sources[scraper_name] = (batch_data["instance"], [(link, i, len(urls)) for i, link in enumerate(urls, 1)])
+    recorder = RunRecorder(db, progress.run_id, 'urls').start()
+    result = HarvestPipeline(db, progress, recorder=recorder, snapshots=build_snapshot_store()).run(sources)
+    recorder.finish(result['outcomes'])
                 
+    db.refresh_daily_prices()
     print("\n✅ Pipeline Finished.")
+    progress.publish('run_finished')
+    progress.close()
     db.close()
 
+#DISCOVERY PHASE for one vendor: yields product links category by category
+#runs on that vendor's fetch thread, so scanning and fetching share its browser
+#with a scheduler every category is scanned first and only the planned links are yielded
+def discover_products(scraper, category_urls, progress, scheduler=None):
+    found = []
+    for category_url in category_urls:
+        print(f"📂 Processing Category: {category_url}")
+        started = time.perf_counter()
+        try:
+            product_links = scraper.scrape_category(category_url)
+            print(f"   -> Found {len(product_links)} products to scrape.")
+        except Exception as e:
+            print(f"❌ Discovery Failed: {e}")
+            progress.publish('category', vendor=scraper.vendor_name, url=category_url,
+                             latency_ms=round((time.perf_counter() - started) * 1000), outcome='error', error=str(e))
+            continue
+        progress.publish('category', vendor=scraper.vendor_name, url=category_url, found=len(product_links),
+                         latency_ms=round((time.perf_counter() - started) * 1000), outcome='ok')
+
+        if scheduler:
+            found.extend(product_links)
+            continue
+        for i, link in enumerate(product_links, 1):
+            yield link, i, len(product_links)
+
+    if scheduler:
+        planned, deferred = scheduler.plan(scraper.vendor_name, found)
+        print(f"🗓️ {scraper.vendor_name}: refreshing {len(planned)} of {len(planned) + deferred} products "
+              f"(budget {scheduler.budget(scraper.vendor_name)})")
+        progress.publish('schedule', vendor=scraper.vendor_name, planned=len(planned), deferred=deferred)
+        for i, link in enumerate(planned, 1):
+            yield link, i, len(planned)
+
 #visit category pages
 #find link
 #scrape and save
-def run_harvest_pipeline():
-    db = DatabaseManager()
+#db / scrapers: resources owned by the caller (the daemon) and left open afterwards
+def run_harvest_pipeline(db=None, scrapers=None):
+    owns_db = db is None
+    db = db or DatabaseManager(matcher=build_ingest_matcher())
+    progress = ProgressPublisher(db)
     
     print(f"🚀 Starting MarketPulse Harvest on {len(TARGET_CATEGORIES)} Categories...")
+    progress.publish('run_started', total=len(TARGET_CATEGORIES))
 
+    #Identify Vendor, one scraper instance per vendor
+    vendors = {}
     for category_url in TARGET_CATEGORIES:
-        print(f"\n------------------------------------------------")
-        print(f"📂 Processing Category: {category_url}")
-        
-        #Identify Vendor
-        scraper = get_scraper_for_url(category_url)
+        scraper = get_scraper_for_url(category_url, scrapers)
         if not scraper:
-            print(f"⚠️ No scraper found for this URL. Skipping.")
+            print(f"⚠️ No scraper found for {category_url}. Skipping.")
             continue
+        vendors.setdefault(scraper.vendor_name, (scraper, []))[1].append(category_url)
+
+    #EXTRACTION PHASE: vendors fetch in parallel, parsing and saving run behind them
+    scheduler = build_scheduler(db)
+    sources = {vendor: (scraper, discover_products(scraper, categories, progress, scheduler))
+               for vendor, (scraper, categories) in vendors.items()}
+    recorder = RunRecorder(db, progress.run_id, 'harvest').start()
+    result = HarvestPipeline(db, progress, recorder=recorder, snapshots=build_snapshot_store(),
+                             keep_drivers=scrapers is not None).run(sources)
+    recorder.finish(result['outcomes'])
+    print(f"   Outcomes: {result['outcomes']}")
+            
+    db.refresh_daily_prices()
+    print("\n✅ Harvest Complete. Data saved to Database.")
+    progress.publish('run_finished')
+    progress.close()
+    if owns_db:
+        db.close()
 
-        #DISCOVERY PHASE
+#resources the daemon keeps alive between jobs: one DatabaseManager (with its
+#connection and the ingest matcher's index), the scrapers with their browsers,
+#the embedding model and the imported forecasting stack
+class DaemonContext:
+    def __init__(self):
+        self.db = DatabaseManager(matcher=build_ingest_matcher())
+        self.scrapers = {}
+        self.matcher = self.db.matcher
+        self.harvests = 0
+
+    def harvest(self):
         try:
-            product_links = scraper.scrape_category(category_url)
-            print(f"   -> Found {len(product_links)} products to scrape.")
-        except Exception as e:
-            print(f"❌ Discovery Failed: {e}")
-            if hasattr(scraper, 'close_driver'): scraper.close_driver()
+            run_harvest_pipeline(self.db, self.scrapers)
+        finally:
+            self.harvests += 1
+            #a long-lived Chrome keeps growing, start fresh ones every few runs
+            if BROWSER_RECYCLE_RUNS and self.harvests % BROWSER_RECYCLE_RUNS == 0:
+                self.close_browsers()
+
+    def match(self):
+        if self.matcher is None:
+            from src.ai.product_matcher import ProductMatcher
+            self.matcher = ProductMatcher()
+        self.matcher.find_matches()
+        #merges rewrite canonical ids, so the ingest index and the rollup are rebuilt
+        if self.db.matcher is not None:
+            self.db.matcher.load_index()
+        self.db.refresh_daily_prices()
+
+    #per-day price aggregates read by the dashboard chart and daily forecasting histories
+    def rollups(self):
+        self.db.refresh_daily_prices()
+
+    #retrain and publish the global model when stale; the dashboard hot-swaps to it
+    def forecasts(self):
+        from src.ai import global_model
+        meta = global_model.registry.read_meta()
+        if meta and (time.time() - meta['trained_at']) / 3600 < FORECAST_RETRAIN_HOURS:
+            print(f"⏭️ Global model {meta['version']} is fresh, skipping retrain")
+            return
+        global_model.train_and_publish(self.db)
+
+    def close_browsers(self):
+        for scraper in self.scrapers.values():
+            if hasattr(scraper, 'close_driver'):
+                scraper.close_driver()
+
+    def close(self):
+        self.close_browsers()
+        self.db.close()
+
+#jobs from config/schedule.yaml, e.g.
+#  harvest: {schedule: "0 6 * * *", group: ingest}
+def load_jobs(context, path=SCHEDULE_FILE, run_now=()):
+    with open(path, "r") as f:
+        config = yaml.safe_load(f) or {}
+    handlers = {
+        'harvest': context.harvest,
+        'matching': context.match,
+        'rollups': context.rollups,
+        'forecasts': context.forecasts,
+    }
+    jobs = []
+    for name, spec in (config.get('jobs') or {}).items():
+        if name not in handlers:
+            raise ValueError(f"Unknown job {name!r} in {path} (expected one of {', '.join(handlers)})")
+        if not spec.get('enabled', True):
             continue
+        jobs.append(Job(name, spec['schedule'], handlers[name], group=spec.get('group'),
+                        run_on_start=name in run_now))
+    unknown = sorted(set(run_now) - {job.name for job in jobs})
+    if unknown:
+        raise ValueError(f"--run-now {', '.join(unknown)} not enabled in {path} "
+                         f"(enabled: {', '.join(job.name for job in jobs) or 'none'})")
+    return jobs
 
-        #EXTRACTION PHASE
-        for i, link in enumerate(product_links, 1): 
-            print(f"   PLEASE WAIT... Scraping Item {i}/{len(product_links)}: {link}")
-            
-            try:
-                data = scraper.scrape_product(link)
-                if data:
-                    db.save_scraped_data(data)
-                else:
-                    print(f"      ❌ Failed to extract data.")
-            except Exception as e:
-                print(f"      ❌ Error: {e}")
-        
-        # Close driver after finishing the category
-        if hasattr(scraper, 'close_driver'):
-            scraper.close_driver()
-            
-    print("\n✅ Harvest Complete. Data saved to Database.")
-    db.close()    
+#long-running replacement for a daily `python main.py` from cron / Task Scheduler
+def run_daemon(schedule_file=SCHEDULE_FILE, run_now=()):
+    #one daemon per machine; checked before the models and connections are loaded
+    with RunLock("daemon"):
+        context = DaemonContext()
+        jobs = load_jobs(context, schedule_file, run_now)
+        if not jobs:
+            print(f"⚠️ No jobs enabled in {schedule_file}")
+            context.close()
+            return
+        print(f"🚀 MarketPulse daemon running {len(jobs)} jobs (pid {os.getpid()})")
+        Daemon(jobs, on_shutdown=context.close).run()
 
 if __name__ == "__main__":
-    run_harvest_pipeline()
+    parser = argparse.ArgumentParser(description="Harvest vendor prices once, or keep running scheduled jobs")
+    parser.add_argument("--daemon", action="store_true", help="run harvest/matching/rollups/forecasts on their schedules")
+    parser.add_argument("--schedule", default=SCHEDULE_FILE, help="job schedule file for --daemon")
+    parser.add_argument("--run-now", nargs="*", default=[], metavar="JOB", help="with --daemon, also run these jobs at startup")
+    args = parser.parse_args()
+
+    if args.daemon:
+        try:
+            run_daemon(args.schedule, args.run_now)
+        except (RuntimeError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    else:
+        #shares the daemon's lock, so a manual run never overlaps a scheduled harvest
+        lock = RunLock("ingest")
+        if not lock.acquire():
+            print(f"⏭️ A harvest or matching run is already in progress (held by {lock.holder()}), exiting")
+            sys.exit(1)
+        try:
+            run_harvest_pipeline()
+        finally:
+            lock.release()
@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.database.db_manager import DatabaseManager
+from src.monitoring.metrics import MODEL_FIT_LATENCY, MODEL_PREDICT_LATENCY
+from src.ai.features import load_histories
+
+_predictor = None
+
+
+def _init_worker():
+    global _predictor
+    from src.ai.price_predictor import PricePredictor
+    _predictor = PricePredictor(mode='local')
+    #one xgboost thread per process, the pool provides the parallelism
+    _predictor.model.set_params(n_jobs=1)
+
+
+#seconds recorded so far in this process, summed over every model label
+def _histogram_seconds(histogram):
+    with histogram.lock:
+        return sum(series[-2] for series in histogram.series.values())
+
+
+#replays one product: at every cutoff the predictor only sees rows up to that
+#day and is scored against the last observed price `horizon` days later
+def backtest_product(task):
+    product_id, dates, prices, min_train, step, horizon = task
+    dates = pd.to_datetime(dates)
+    rows = []
+    fit_seconds = predict_seconds = 0.0
+    last_date = dates[-1]
+
+    for cutoff in range(min_train - 1, len(prices), step):
+        target_date = dates[cutoff] + pd.Timedelta(days=horizon)
+        if target_date > last_date:
+            break
+        history = pd.DataFrame({'scraped_at': dates[:cutoff + 1], 'price': prices[:cutoff + 1]})
+
+        fit_before, predict_before = _histogram_seconds(MODEL_FIT_LATENCY), _histogram_seconds(MODEL_PREDICT_LATENCY)
+        result = _predictor._process_prediction(history)
+        fit_seconds += _histogram_seconds(MODEL_FIT_LATENCY) - fit_before
+        predict_seconds += _histogram_seconds(MODEL_PREDICT_LATENCY) - predict_before
+        if not result:
+            continue
+
+        actual = float(prices[np.searchsorted(dates, target_date, side='right') - 1])
+        current = result['current_price']
+        actual_change = (actual - current) / current * 100
+        rows.append({
+            'predicted': result['predicted_price_7_days'],
+            'actual': actual,
+            'predicted_change': result['percent_change'],
+            'actual_change': actual_change,
+            'recommendation': result['recommendation'],
+            'actual_recommendation': _predictor._get_procurement_advice(actual_change),
+        })
+
+    return {'product_id': product_id, 'rows': rows,
+            'fit_seconds': fit_seconds, 'predict_seconds': predict_seconds}
+
+
+def _tasks(history, min_train, step, horizon, limit=None):
+    tasks = []
+    for pid, group in history.groupby('product_id', sort=False):
+        if len(group) < min_train:
+            continue
+        tasks.append((int(pid), group['scraped_at'].to_numpy(), group['price'].to_numpy(dtype=float),
+                      min_train, step, horizon))
+        if limit and len(tasks) >= limit:
+            break
+    return tasks
+
+
+def summarize(results, wall_seconds):
+    rows = [row for r in results for row in r['rows']]
+    timed = [r for r in results if r['rows']]
+    summary = {'products': len(results), 'products_scored': len(timed), 'forecasts': len(rows),
+               'wall_seconds': round(wall_seconds, 2)}
+    if not rows:
+        return summary
+
+    predicted = np.array([r['predicted'] for r in rows])
+    actual = np.array([r['actual'] for r in rows])
+    errors = np.abs(predicted - actual)
+    predicted_change = np.array([r['predicted_change'] for r in rows])
+    actual_change = np.array([r['actual_change'] for r in rows])
+    fit = np.array([r['fit_seconds'] for r in timed])
+    predict = np.array([r['predict_seconds'] for r in timed])
+
+    per_advice = {}
+    for row in rows:
+        stats = per_advice.setdefault(row['recommendation'], {'issued': 0, 'hits': 0})
+        stats['issued'] += 1
+        stats['hits'] += row['recommendation'] == row['actual_recommendation']
+
+    summary.update({
+        'mae': round(float(errors.mean()), 2),
+        'mape': round(float((errors / actual).mean() * 100), 3),
+        'recommendation_hit_rate': round(float(np.mean([r['recommendation'] == r['actual_recommendation'] for r in rows])), 4),
+        'direction_hit_rate': round(float(np.mean(np.sign(predicted_change) == np.sign(actual_change))), 4),
+        'recommendations': {k: {**v, 'hit_rate': round(v['hits'] / v['issued'], 4)} for k, v in per_advice.items()},
+        'fit_ms_per_product': {'mean': round(float(fit.mean()) * 1000, 2), 'p95': round(float(np.percentile(fit, 95)) * 1000, 2)},
+        'predict_ms_per_product': {'mean': round(float(predict.mean()) * 1000, 2), 'p95': round(float(np.percentile(predict, 95)) * 1000, 2)},
+    })
+    return summary
+
+
+def run_backtest(history, min_train=15, step=7, horizon=7, workers=None, limit=None):
+    tasks = _tasks(history, min_train, step, horizon, limit)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        results = list(pool.map(backtest_product, tasks, chunksize=max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))))
+    return summarize(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the price predictor")
+    parser.add_argument("--min-train", type=int, default=15, help="rows of history before the first forecast")
+    parser.add_argument("--step", type=int, default=7, help="rows between successive cutoffs")
+    parser.add_argument("--horizon", type=int, default=7, help="days ahead being forecast")
+    parser.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    parser.add_argument("--limit", type=int, help="only backtest the first N products")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    conn = DatabaseManager().get_connection()
+    try:
+        history = load_histories(conn)
+    finally:
+        conn.close()
+
+    summary = run_backtest(history, args.min_train, args.step, args.horizon, args.workers, args.limit)
+    if not summary['forecasts']:
+        print("⚠️ No product had enough history to backtest")
+    else:
+        print(f"📊 {summary['forecasts']} forecasts over {summary['products_scored']} products in {summary['wall_seconds']}s")
+        print(f"   MAE {summary['mae']:,.2f} | MAPE {summary['mape']:.2f}% | "
+              f"advice hit rate {summary['recommendation_hit_rate']:.1%} | direction {summary['direction_hit_rate']:.1%}")
+        print(f"   fit {summary['fit_ms_per_product']['mean']} ms/product (p95 {summary['fit_ms_per_product']['p95']}) | "
+              f"predict {summary['predict_ms_per_product']['mean']} ms/product (p95 {summary['predict_ms_per_product']['p95']})")
+        for advice, stats in sorted(summary['recommendations'].items()):
+            print(f"   {advice}: {stats['issued']} issued, {stats['hit_rate']:.1%} hit")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
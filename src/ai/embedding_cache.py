@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+
+DEFAULT_ROOT = os.getenv("EMBEDDING_CACHE_DIR", os.path.join("data", "embeddings"))
+KEY_BYTES = 16
+
+
+#same product name modulo case and spacing -> same key
+def normalize_name(name):
+    return " ".join(str(name).lower().split())
+
+
+def name_key(name, model_name):
+    digest = hashlib.blake2b(f"{model_name}\x00{normalize_name(name)}".encode("utf-8"), digest_size=KEY_BYTES)
+    return digest.digest()
+
+
+#append-only on-disk store of name embeddings for one model
+#vectors.f32 holds float32 rows, keys.bin holds the matching 16-byte name hashes
+class EmbeddingCache:
+    def __init__(self, model_name, root=DEFAULT_ROOT):
+        self.model_name = model_name
+        self.dir = os.path.join(root, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.keys_path = os.path.join(self.dir, "keys.bin")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.lock = threading.Lock()
+        self.dim = None
+        self.index = {}  # key -> row
+        self.vectors = None
+        self._load()
+
+    def __len__(self):
+        return len(self.index)
+
+    #unreadable meta or a torn key file loads as an empty cache; the next append starts
+    #the files over and names are re-encoded as they come
+    def _load(self):
+        if not os.path.exists(self.meta_path):
+            return
+        try:
+            with open(self.meta_path) as f:
+                dim = int(json.load(f)["dim"])
+            with open(self.keys_path, "rb") as f:
+                raw = f.read()
+            vector_bytes = os.path.getsize(self.vectors_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Embedding cache at {self.dir} unreadable, starting cold: {e}")
+            return
+        if dim <= 0 or len(raw) % KEY_BYTES:
+            print(f"⚠️ Embedding cache at {self.dir} is corrupt (dim {dim}, {len(raw)} key bytes), starting cold")
+            return
+
+        self.dim = dim
+        row_bytes = dim * 4
+        #a crash between the two appends can leave one side longer, trust the shorter
+        count = min(len(raw) // KEY_BYTES, vector_bytes // row_bytes)
+        self.index = {raw[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(count)}
+        self._map(count)
+
+    def _map(self, count):
+        if count:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+        else:
+            self.vectors = None
+
+    def _append(self, keys, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.dim is not None and vectors.shape[1] != self.dim:
+            print(f"⚠️ Embedding size changed from {self.dim} to {vectors.shape[1]}, starting the cache over")
+            self.dim, self.index, self.vectors = None, {}, None
+        if self.dim is None:
+            os.makedirs(self.dir, exist_ok=True)
+            self.dim = vectors.shape[1]
+            with open(self.meta_path, "w") as f:
+                json.dump({"model": self.model_name, "dim": self.dim}, f)
+
+        start = len(self.index)
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(start * self.dim * 4)
+            f.write(vectors.tobytes())
+        with open(self.keys_path, "ab") as f:
+            f.truncate(start * KEY_BYTES)
+            f.write(b"".join(keys))
+
+        for offset, key in enumerate(keys):
+            self.index[key] = start + offset
+        self._map(len(self.index))
+
+    #embeddings for names, calling encode_fn only for names never seen before
+    def get_many(self, names, encode_fn):
+        keys = [name_key(name, self.model_name) for name in names]
+
+        with self.lock:
+            missing = {}
+            for key, name in zip(keys, names):
+                if key not in self.index and key not in missing:
+                    missing[key] = name
+
+            if missing:
+                print(f"🧮 Encoding {len(missing)} new names ({len(self.index)} cached)")
+                encoded = encode_fn(list(missing.values()))
+                self._append(list(missing.keys()), encoded)
+
+            if not keys:
+                return np.empty((0, self.dim or 0), dtype=np.float32)
+            rows = np.fromiter((self.index[key] for key in keys), dtype=np.int64, count=len(keys))
+            return np.asarray(self.vectors[rows])
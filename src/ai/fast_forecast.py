@@ -0,0 +1,95 @@
+import os
+import numpy as np
+
+#below this many rows there is nothing to forecast from
+MIN_ROWS = 3
+#XGBoost is only worth fitting on series at least this long...
+XGB_MIN_ROWS = int(os.getenv("FORECAST_XGB_MIN_ROWS", "30"))
+#...whose recent step-to-step moves are at least this large (std of pct change)
+XGB_MIN_VOLATILITY = float(os.getenv("FORECAST_XGB_MIN_VOLATILITY", "0.005"))
+#a price unchanged for this many rows is treated as settled at its last change
+SETTLED_ROWS = 7
+#trend is only extrapolated when the fitted line explains the recent window
+TREND_WINDOW = 14
+TREND_MIN_R2 = 0.6
+EWMA_ALPHA = 0.3
+#Holt trend smoothing and per-step damping for the 'ewma' tier
+HOLT_BETA = 0.1
+HOLT_DAMPING = 0.9
+
+TIERS = ('last_change', 'trend', 'ewma', 'xgboost')
+
+
+#rows since the price last moved by more than rel_tol
+def rows_since_change(prices, rel_tol=1e-4):
+    prices = np.asarray(prices, dtype=np.float64)
+    moved = np.abs(np.diff(prices)) > rel_tol * np.abs(prices[1:])
+    changes = np.flatnonzero(moved)
+    return len(prices) - 1 - (changes[-1] + 1) if len(changes) else len(prices) - 1
+
+
+def volatility(prices, window=30):
+    recent = np.asarray(prices[-(window + 1):], dtype=np.float64)
+    if len(recent) < 3:
+        return 0.0
+    return float(np.std(np.diff(recent) / recent[:-1]))
+
+
+#least-squares line over the last `window` rows: (slope per row, level at the last row, r2)
+def linear_trend(prices, window=TREND_WINDOW):
+    y = np.asarray(prices[-window:], dtype=np.float64)
+    x = np.arange(len(y), dtype=np.float64)
+    x_centered = x - x.mean()
+    denom = float(x_centered @ x_centered)
+    if denom == 0:
+        return 0.0, float(y[-1]), 0.0
+    slope = float(x_centered @ (y - y.mean())) / denom
+    fitted = y.mean() + slope * x_centered
+    total = float(((y - y.mean()) ** 2).sum())
+    r2 = 1.0 - float(((y - fitted) ** 2).sum()) / total if total else 0.0
+    return slope, float(fitted[-1]), r2
+
+
+#damped Holt trend per row (level and trend smoothed together)
+#only the last `window` rows are smoothed: the damped trend has forgotten anything older
+def holt_trend(prices, alpha=EWMA_ALPHA, beta=HOLT_BETA, damping=HOLT_DAMPING, window=TREND_WINDOW * 4):
+    prices = np.asarray(prices[-window:], dtype=np.float64)
+    level, trend = prices[0], prices[1] - prices[0]
+    for price in prices[1:]:
+        previous = level
+        level = alpha * price + (1 - alpha) * (level + damping * trend)
+        trend = beta * (level - previous) + (1 - beta) * damping * trend
+    return float(trend)
+
+
+#last price plus the damped smoothed trend over the horizon; anchoring on the
+#last price (not the smoothed level) keeps a recent drop from forecasting a rebound
+def damped_trend_forecast(prices, horizon=7, damping=HOLT_DAMPING):
+    steps = sum(damping ** h for h in range(1, horizon + 1))
+    return float(prices[-1]) + holt_trend(prices, damping=damping) * steps
+
+
+#cheapest estimator that suits the series; None when it is too short
+def choose_tier(prices):
+    n = len(prices)
+    if n < MIN_ROWS:
+        return None
+    if rows_since_change(prices) >= SETTLED_ROWS:
+        return 'last_change'
+    if n >= XGB_MIN_ROWS and volatility(prices) >= XGB_MIN_VOLATILITY:
+        return 'xgboost'
+    if n >= 5 and linear_trend(prices)[2] >= TREND_MIN_R2:
+        return 'trend'
+    return 'ewma'
+
+
+#closed-form forecast `horizon` rows ahead for the statistical tiers
+def fast_forecast(prices, tier, horizon=7):
+    if tier == 'last_change':
+        return float(prices[-1])
+    if tier == 'trend':
+        slope, level, _ = linear_trend(prices)
+        return level + slope * horizon
+    if tier == 'ewma':
+        return damped_trend_forecast(prices, horizon)
+    raise ValueError(f"{tier} is not a statistical tier")
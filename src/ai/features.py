@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+#per-product model inputs (PricePredictor local mode)
+LOCAL_FEATURES = ['day_of_year', 'price', 'price_lag_1', 'price_lag_7']
+
+#scale-free inputs shared by every product (global model)
+PANEL_FEATURES = ['day_of_week', 'day_of_year', 'month', 'history_len',
+                  'lag_1_ratio', 'lag_7_ratio', 'rolling_7_ratio']
+
+
+#price history for many products in one query, sorted by product then time
+#product_ids=None loads everything; daily=True averages each product's day across vendors
+#(from the daily_prices rollup); otherwise market_data_daily, so change-only interval
+#rows come back as daily series
+def load_histories(conn, product_ids=None, daily=False):
+    where = "WHERE product_id = ANY(%s)" if product_ids is not None else ""
+    params = (list(product_ids),) if product_ids is not None else None
+    if daily:
+        query = f"""
+            SELECT product_id, day AS scraped_at, SUM(avg_price * samples) / SUM(samples) AS price
+            FROM daily_prices
+            {where}
+            GROUP BY product_id, day
+            ORDER BY product_id, scraped_at
+        """
+    else:
+        query = f"""
+            SELECT product_id, scraped_at, price
+            FROM market_data_daily
+            {where}
+            ORDER BY product_id, scraped_at ASC
+        """
+    df = pd.read_sql(query, conn, params=params)
+    df['scraped_at'] = pd.to_datetime(df['scraped_at'])
+    df['price'] = df['price'].astype(float)
+    return df
+
+
+#positions of each row inside its (contiguous) group
+def group_positions(group_ids):
+    group_ids = np.asarray(group_ids)
+    n = len(group_ids)
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = group_ids[1:] != group_ids[:-1]
+    start_index = np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+    return np.arange(n) - start_index
+
+
+#groupby().shift over contiguous groups using index arithmetic
+#periods > 0 looks back, periods < 0 looks ahead; out-of-group -> NaN
+def grouped_shift(values, group_ids, periods):
+    values = np.asarray(values, dtype=np.float64)
+    group_ids = np.asarray(group_ids)
+    n = len(values)
+    source = np.arange(n) - periods
+    valid = (source >= 0) & (source < n)
+    valid[valid] = group_ids[source[valid]] == group_ids[valid]
+    shifted = np.full(n, np.nan)
+    shifted[valid] = values[source[valid]]
+    return shifted
+
+
+#trailing mean over up to `window` rows of the same group
+def grouped_rolling_mean(values, group_ids, window):
+    values = np.asarray(values, dtype=np.float64)
+    positions = group_positions(group_ids)
+    cumsum = np.concatenate(([0.0], np.cumsum(values)))
+    width = np.minimum(positions + 1, window)
+    end = np.arange(1, len(values) + 1)
+    return (cumsum[end] - cumsum[end - width]) / width
+
+
+def _group_ids(df):
+    if 'product_id' in df:
+        return df['product_id'].to_numpy()
+    return np.zeros(len(df), dtype=np.int64)
+
+
+#lags and future target for stacked per-product series
+def add_local_features(df, forecast_days=7):
+    df = df.copy()
+    groups, prices = _group_ids(df), df['price'].to_numpy(dtype=np.float64)
+    df['day_of_year'] = df['scraped_at'].dt.dayofyear
+    df['price_lag_1'] = grouped_shift(prices, groups, 1)
+    df['price_lag_7'] = grouped_shift(prices, groups, 7)
+    df['target_future_price'] = grouped_shift(prices, groups, -forecast_days)
+    return df
+
+
+#lag, calendar and target-ratio features for stacked daily series
+def build_panel_features(df, forecast_days=7):
+    df = df.copy()
+    if 'product_id' not in df:
+        df['product_id'] = 0
+    groups, prices = _group_ids(df), df['price'].to_numpy(dtype=np.float64)
+
+    df['day_of_week'] = df['scraped_at'].dt.dayofweek
+    df['day_of_year'] = df['scraped_at'].dt.dayofyear
+    df['month'] = df['scraped_at'].dt.month
+    df['history_len'] = group_positions(groups)
+    df['lag_1_ratio'] = grouped_shift(prices, groups, 1) / prices
+    df['lag_7_ratio'] = grouped_shift(prices, groups, 7) / prices
+    df['rolling_7_ratio'] = grouped_rolling_mean(prices, groups, 7) / prices
+    df['target_ratio'] = grouped_shift(prices, groups, -forecast_days) / prices
+    return df
+
+
+#contiguous float32 design matrix for batch training or inference
+def feature_matrix(df, columns):
+    return np.ascontiguousarray(df[columns].to_numpy(dtype=np.float32))
@@ -0,0 +1,148 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import xgboost as xgb
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.database.db_manager import DatabaseManager
+from src.monitoring.metrics import MODEL_FIT_LATENCY, MODEL_PREDICT_LATENCY
+from src.ai.features import PANEL_FEATURES, load_histories, build_panel_features, feature_matrix
+from src.ai.model_registry import ModelRegistry, ServingModel
+
+REGISTRY_NAME = "global_price"
+MIN_HISTORY = 8
+VALIDATION_DAYS = 14
+
+
+#one XGBoost model pooled over every product and vendor; predicts the
+#7-day-ahead price as a ratio of today's price
+class GlobalPriceModel:
+    def __init__(self, forecast_days=7):
+        self.forecast_days = forecast_days
+        self.model = xgb.XGBRegressor(objective='reg:squarederror', n_estimators=300, learning_rate=0.05,
+                                      max_depth=6, subsample=0.8, colsample_bytree=0.8)
+        self.meta = {}
+
+    @staticmethod
+    def load_history(conn):
+        #daily average per product, all vendors pooled
+        return load_histories(conn, daily=True)
+
+    def _fit(self, train_df):
+        with MODEL_FIT_LATENCY.time('xgboost_global'):
+            self.model.fit(feature_matrix(train_df, PANEL_FEATURES), train_df['target_ratio'].to_numpy())
+
+    def _training_rows(self, history):
+        features = build_panel_features(history, self.forecast_days)
+        train_df = features.dropna(subset=['target_ratio'])
+        return train_df[train_df['history_len'] >= 1]
+
+    #holds out the last VALIDATION_DAYS for MAE/MAPE, then refits on everything
+    def train(self, history):
+        train_df = self._training_rows(history)
+        if train_df.empty:
+            raise ValueError("Not enough history to train the global model")
+
+        metrics = {}
+        cutoff = train_df['scraped_at'].max() - np.timedelta64(VALIDATION_DAYS, 'D')
+        #targets of the fit rows come from history up to the cutoff only; rows just
+        #before it would otherwise learn 7-day-ahead prices from inside the holdout
+        fit_part = self._training_rows(history[history['scraped_at'] <= cutoff])
+        holdout = train_df[train_df['scraped_at'] > cutoff]
+        if len(fit_part) and len(holdout):
+            self._fit(fit_part)
+            predicted = self.model.predict(feature_matrix(holdout, PANEL_FEATURES)) * holdout['price'].to_numpy()
+            actual = holdout['target_ratio'].to_numpy() * holdout['price'].to_numpy()
+            metrics = {
+                'val_rows': int(len(holdout)),
+                'val_mae': float(np.mean(np.abs(predicted - actual))),
+                'val_mape': float(np.mean(np.abs(predicted - actual) / actual) * 100),
+            }
+
+        self._fit(train_df)
+        self.meta = {
+            'trained_at': time.time(),
+            'rows': int(len(train_df)),
+            'products': int(train_df['product_id'].nunique()),
+            'window_start': str(train_df['scraped_at'].min().date()),
+            'window_end': str(train_df['scraped_at'].max().date()),
+            'features': PANEL_FEATURES,
+            'forecast_days': self.forecast_days,
+            'metrics': metrics,
+            'xgboost_version': xgb.__version__,
+        }
+        return self.meta
+
+    #latest-row forecast for every product in one predict call
+    #returns {product_id: (current_price, predicted_price)}
+    def predict_latest(self, history):
+        features = build_panel_features(history, self.forecast_days)
+        latest = features.groupby('product_id', sort=False).tail(1)
+        latest = latest[latest['history_len'] >= MIN_HISTORY - 1]
+        if latest.empty:
+            return {}
+
+        with MODEL_PREDICT_LATENCY.time('xgboost_global'):
+            ratios = self.model.predict(feature_matrix(latest, PANEL_FEATURES))
+        current = latest['price'].to_numpy(dtype=float)
+        return {int(pid): (float(price), float(price * ratio))
+                for pid, price, ratio in zip(latest['product_id'], current, ratios)}
+
+    #refuses a model trained on a different feature schema
+    @classmethod
+    def from_registry(cls, model_path, meta):
+        if meta.get('features') != PANEL_FEATURES:
+            raise ValueError(f"feature schema mismatch: {meta.get('features')}")
+        instance = cls(forecast_days=meta.get('forecast_days', 7))
+        instance.model.load_model(model_path)
+        instance.meta = meta
+        return instance
+
+
+registry = ModelRegistry(REGISTRY_NAME)
+serving = ServingModel(registry, GlobalPriceModel.from_registry,
+                       check_seconds=int(os.getenv("MODEL_RELOAD_SECONDS", "30")))
+
+
+#the currently published model (hot-swapped when a retrain publishes); None if none yet
+def get_global_model():
+    return serving.get()
+
+
+def train_and_publish(db=None):
+    db = db or DatabaseManager()
+    conn = db.get_connection()
+    try:
+        history = GlobalPriceModel.load_history(conn)
+    finally:
+        conn.close()
+
+    model = GlobalPriceModel()
+    meta = model.train(history)
+    version = registry.publish(model.model.save_model, meta)
+    print(f"✅ Global model {version} trained on {meta['rows']} rows / {meta['products']} products "
+          f"(val MAPE {meta['metrics'].get('val_mape', float('nan')):.2f}%)")
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and publish the pooled price forecasting model")
+    parser.add_argument("--if-older-than", type=float, metavar="HOURS",
+                        help="only retrain when the published model is older than this")
+    parser.add_argument("--activate", metavar="VERSION", help="roll CURRENT to an existing version instead of training")
+    args = parser.parse_args()
+
+    if args.activate:
+        registry.activate(args.activate)
+        print(f"🔁 {REGISTRY_NAME} now serves {args.activate}")
+        sys.exit(0)
+
+    meta = registry.read_meta()
+    if args.if_older_than is not None and meta:
+        age = (time.time() - meta['trained_at']) / 3600
+        if age < args.if_older_than:
+            print(f"⏭️ Global model {meta['version']} is {age:.1f}h old, skipping retrain")
+            sys.exit(0)
+    train_and_publish()
@@ -0,0 +1,109 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+REGISTRY_ROOT = os.getenv("MODEL_REGISTRY_DIR", os.path.join("data", "models"))
+MODEL_FILE = "model.ubj"   # XGBoost native binary (UBJSON)
+META_FILE = "meta.json"
+POINTER_FILE = "CURRENT"
+VERSION_RE = re.compile(r'^v(\d{4,})$')
+
+
+#versioned on-disk store: <root>/<name>/v0001/{model.ubj, meta.json}
+#CURRENT holds the served version and is swapped with an atomic rename
+class ModelRegistry:
+    def __init__(self, name, root=REGISTRY_ROOT):
+        self.name = name
+        self.dir = os.path.join(root, name)
+        self.pointer_path = os.path.join(self.dir, POINTER_FILE)
+
+    def versions(self):
+        if not os.path.isdir(self.dir):
+            return []
+        found = [d for d in os.listdir(self.dir) if VERSION_RE.match(d)]
+        return sorted(found, key=lambda d: int(VERSION_RE.match(d).group(1)))
+
+    def current_version(self):
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def version_dir(self, version):
+        return os.path.join(self.dir, version)
+
+    def read_meta(self, version=None):
+        version = version or self.current_version()
+        if not version:
+            return None
+        with open(os.path.join(self.version_dir(version), META_FILE)) as f:
+            return json.load(f)
+
+    #writes a new version next to the live one, then repoints CURRENT
+    #save_fn(model_path) writes the model file; meta is stored alongside it
+    def publish(self, save_fn, meta, activate=True):
+        os.makedirs(self.dir, exist_ok=True)
+        existing = self.versions()
+        number = int(VERSION_RE.match(existing[-1]).group(1)) + 1 if existing else 1
+        version = f"v{number:04d}"
+
+        staging = os.path.join(self.dir, f".{version}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        save_fn(os.path.join(staging, MODEL_FILE))
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump({**meta, 'version': version, 'published_at': time.time()}, f, indent=2)
+        os.rename(staging, self.version_dir(version))
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        if not os.path.isdir(self.version_dir(version)):
+            raise ValueError(f"Unknown model version: {self.name}/{version}")
+        tmp_pointer = self.pointer_path + ".tmp"
+        with open(tmp_pointer, "w") as f:
+            f.write(version)
+        os.replace(tmp_pointer, self.pointer_path)
+
+    def model_path(self, version=None):
+        version = version or self.current_version()
+        return os.path.join(self.version_dir(version), MODEL_FILE) if version else None
+
+
+#what the web app serves from: the CURRENT model, re-checked at most every
+#check_seconds and swapped in one reference assignment once the new one is loaded
+class ServingModel:
+    def __init__(self, registry, load_fn, check_seconds=30):
+        self.registry = registry
+        self.load_fn = load_fn
+        self.check_seconds = check_seconds
+        self.model = None
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self):
+        if time.time() - self.checked_at >= self.check_seconds:
+            self.refresh()
+        return self.model
+
+    def refresh(self):
+        with self.lock:
+            self.checked_at = time.time()
+            version = self.registry.current_version()
+            if not version or version == self.version:
+                return self.model
+            try:
+                model = self.load_fn(self.registry.model_path(version), self.registry.read_meta(version))
+            except Exception as e:
+                print(f"⚠️ Could not load {self.registry.name}/{version}, keeping {self.version}: {e}")
+                return self.model
+            self.model, self.version = model, version
+            print(f"🔁 Serving {self.registry.name} {version}")
+            return model
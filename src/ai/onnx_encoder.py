@@ -0,0 +1,91 @@
+import os
+import numpy as np
+
+DEFAULT_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("data", "onnx"))
+
+
+#one-off export: sentence-transformers checkpoint -> fp32 ONNX -> dynamic int8 ONNX
+#needs torch and transformers, but only here; encoding does not
+def export_quantized(model_name, out_dir):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(out_dir, exist_ok=True)
+    hub_name = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    tokenizer = AutoTokenizer.from_pretrained(hub_name)
+    model = AutoModel.from_pretrained(hub_name).eval()
+    tokenizer.save_pretrained(out_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic = {name: {0: "batch", 1: "tokens"} for name in names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "tokens"}
+
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(model, tuple(sample[name] for name in names), fp32_path,
+                          input_names=names, output_names=["last_hidden_state"],
+                          dynamic_axes=dynamic, opset_version=14)
+
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"📦 Exported {model_name} to {int8_path}")
+    return int8_path
+
+
+#CPU sentence encoder over the int8 ONNX export, with the same
+#mean pooling + L2 normalisation as all-MiniLM-L6-v2
+class OnnxEncoder:
+    def __init__(self, model_name='all-MiniLM-L6-v2', model_dir=None, batch_size=64, max_length=128, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir or os.path.join(DEFAULT_DIR, model_name.replace("/", "_"))
+        model_path = os.path.join(self.model_dir, "model.int8.onnx")
+        if not os.path.exists(model_path):
+            model_path = export_quantized(model_name, self.model_dir)
+
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    #sorted by token length so each batch pads only to its own longest name
+    def encode(self, sentences, convert_to_numpy=True, **_):
+        encodings = self.tokenizer.encode_batch(list(sentences))
+        order = np.argsort([len(e.ids) for e in encodings], kind="stable")
+        output = None
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            width = max(len(encodings[i].ids) for i in batch)
+            input_ids = np.zeros((len(batch), width), dtype=np.int64)
+            attention = np.zeros((len(batch), width), dtype=np.int64)
+            for row, i in enumerate(batch):
+                ids = encodings[i].ids
+                input_ids[row, :len(ids)] = ids
+                attention[row, :len(ids)] = 1
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = attention[:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            if output is None:
+                output = np.empty((len(encodings), pooled.shape[1]), dtype=np.float32)
+            output[batch] = pooled
+
+        if output is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return output
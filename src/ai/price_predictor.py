@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 import xgboost as xgb
 import sys
@@ -7,45 +6,78 @@ from datetime import timedelta
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from src.database.db_manager import DatabaseManager
+from src.monitoring.metrics import MODEL_FIT_LATENCY, MODEL_PREDICT_LATENCY, FORECAST_TIER
+from src.ai.global_model import get_global_model
+from src.ai.features import LOCAL_FEATURES, load_histories, add_local_features, feature_matrix
+from src.ai.fast_forecast import choose_tier, fast_forecast
 
 class PricePredictor:
-    def __init__(self):
+    #mode 'local' fits a model per request, 'global' serves the pooled model
+    #published to the registry by src/ai/global_model.py and never trains inline
+    def __init__(self, mode=None):
         self.db = DatabaseManager()
         self.model = xgb.XGBRegressor(objective='reg:squarederror', n_estimators=100, learning_rate=0.05, max_depth=4)
         self.forecast_days = 7
+        self.mode = mode or os.getenv("FORECAST_MODE", "local")
+        if self.mode == 'global' and not self.global_model:
+            print("⚠️ FORECAST_MODE=global but no model is published yet (run python -m src.ai.global_model)")
+
+    #looked up per call so a newly published version is picked up without a restart
+    @property
+    def global_model(self):
+        return get_global_model() if self.mode == 'global' else None
+
+    #one query for any number of products
+    def _load(self, product_ids, daily=False):
+        conn = self.db.get_connection()
+        try:
+            return load_histories(conn, product_ids, daily=daily)
+        finally:
+            conn.close()
+
+    #feature lookup + one predict call for every series in df
+    def _predict_global(self, df):
+        forecasts = self.global_model.predict_latest(df)
+        return {pid: self._build_result(current, predicted) for pid, (current, predicted) in forecasts.items()}
+
+    #lag features and future target, shifted per product when several are stacked
+    def _build_features(self, df):
+        return add_local_features(df, self.forecast_days)
 
     def _process_prediction(self, df):
-        if len(df) < 15: return None
-        
-        # Prepare data
-        df = df.copy()
-        df['day_of_year'] = df['scraped_at'].dt.dayofyear
-        df['price_lag_1'] = df['price'].shift(1)
-        df['price_lag_7'] = df['price'].shift(7)
-        df['target_future_price'] = df['price'].shift(-self.forecast_days)
-        
+        if self.mode == 'global': return None
+        return self._forecast(df, features=None)
+
+    #tiered: settled, short or calm series get a closed-form NumPy estimate,
+    #only long and volatile ones pay for an XGBoost fit
+    def _forecast(self, df, features):
+        prices = df['price'].to_numpy(dtype=np.float64)
+        tier = choose_tier(prices)
+        if tier is None: return None
+        FORECAST_TIER.inc(tier)
+        if tier == 'xgboost':
+            return self._fit_and_predict(features if features is not None else self._build_features(df))
+        with MODEL_PREDICT_LATENCY.time(tier):
+            predicted_price = fast_forecast(prices, tier, self.forecast_days)
+        return self._build_result(float(prices[-1]), predicted_price)
+
+    def _fit_and_predict(self, df):
         train_df = df.dropna()
         if train_df.empty: return None
 
         # Train model
-        features = ['day_of_year', 'price', 'price_lag_1', 'price_lag_7']
-        X = train_df[features]
-        y = train_df['target_future_price']
-        self.model.fit(X, y)
-
-        # Predict prices
-        last_row = df.iloc[-1]
-        price_last_week = df.iloc[-8]['price'] if len(df) >= 8 else last_row['price']
-        
-        current_features = pd.DataFrame([{
-            'day_of_year': last_row['scraped_at'].dayofyear,
-            'price': last_row['price'],
-            'price_lag_1': df.iloc[-2]['price'],
-            'price_lag_7': price_last_week
-        }])
-        
-        predicted_price = self.model.predict(current_features)[0]
-        current_price = float(last_row['price'])
+        X = feature_matrix(train_df, LOCAL_FEATURES)
+        y = train_df['target_future_price'].to_numpy()
+        with MODEL_FIT_LATENCY.time('xgboost'):
+            self.model.fit(X, y)
+
+        # Predict prices from the newest row's lags
+        current_features = feature_matrix(df.iloc[[-1]], LOCAL_FEATURES)
+        with MODEL_PREDICT_LATENCY.time('xgboost'):
+            predicted_price = float(self.model.predict(current_features)[0])
+        return self._build_result(float(df['price'].iloc[-1]), predicted_price)
+
+    def _build_result(self, current_price, predicted_price):
         change_percent = ((predicted_price - current_price) / current_price) * 100
         
         return {
@@ -56,34 +88,40 @@ class PricePredictor:
         }
 
     def predict_single(self, product_id):
-        conn = self.db.get_connection()
-        try:
-            query = "SELECT scraped_at, price FROM market_data WHERE product_id = %s ORDER BY scraped_at ASC"
-            df = pd.read_sql(query, conn, params=(product_id,))
-            df['scraped_at'] = pd.to_datetime(df['scraped_at'])
-            return self._process_prediction(df)
-        finally:
-            conn.close()
+        if self.global_model:
+            return self._predict_global(self._load([product_id], daily=True)).get(int(product_id))
+        return self._process_prediction(self._load([product_id]))
+
+    #forecasts many products from one query and one feature pass
+    #returns {product_id: result or None}
+    def predict_many(self, product_ids):
+        if not product_ids: return {}
+        if self.global_model:
+            results = {int(pid): None for pid in product_ids}
+            results.update(self._predict_global(self._load(product_ids, daily=True)))
+            return results
+        #global mode without a published model: serving never trains inline
+        if self.mode == 'global': return {int(pid): None for pid in product_ids}
+
+        df = self._load(product_ids)
+        results = {int(pid): None for pid in product_ids}
+        if df.empty: return results
+
+        features = self._build_features(df)
+
+        for pid, history in features.groupby('product_id', sort=False):
+            results[int(pid)] = self._forecast(history, features=history)
+        return results
 
     #predicts average price
+    #the group's daily series is the mean of its members' daily prices
     def predict_group(self, product_ids):
         if not product_ids: return None
-        conn = self.db.get_connection()
-        try:
-            #Get average price of the GROUP per day
-            format_strings = ','.join(['%s'] * len(product_ids))
-            query = f"""
-                SELECT DATE(scraped_at) as scraped_at, AVG(price) as price 
-                FROM market_data 
-                WHERE product_id IN ({format_strings}) 
-                GROUP BY DATE(scraped_at) 
-                ORDER BY scraped_at ASC
-            """
-            df = pd.read_sql(query, conn, params=tuple(product_ids))
-            df['scraped_at'] = pd.to_datetime(df['scraped_at'])
-            return self._process_prediction(df)
-        finally:
-            conn.close()
+        history = self._load(product_ids, daily=True)
+        df = history.groupby('scraped_at', as_index=False)['price'].mean()
+        if self.global_model:
+            return self._predict_global(df).get(0)
+        return self._process_prediction(df)
 
     def _get_procurement_advice(self, percent):
         if percent < -5.0: return "📉 WAIT (Significant Drop)"
@@ -1,15 +1,55 @@
+import argparse
+import os
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from collections import Counter
+from psycopg2.extras import execute_values
 from src.database.db_manager import DatabaseManager
+from src.ai.embedding_cache import EmbeddingCache
+from src.ai.union_find import UnionFind
+from src.ai.spec_parser import SPEC_FIELDS, extract_specs, build_blocks
+
+#optional local ANN index, exact blocked search is used without it
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+#ANN results cannot be masked by vendor/specs before the top-k, so fetch this many times more
+ANN_OVERFETCH = 4
 
 #get suitable model for laptop names
 class ProductMatcher:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    #backend: 'torch' (SentenceTransformer, fp32) or 'onnx' (int8, onnxruntime on CPU)
+    def __init__(self, model_name='all-MiniLM-L6-v2', top_k=10, block_size=512, use_ann=False, backend=None):
         print("🧠 Loading AI Model... (This happens only once)")
-        self.model = SentenceTransformer(model_name)
+        self.backend = backend or os.getenv("EMBEDDING_BACKEND", "torch")
+        self.model = self.load_encoder(model_name, self.backend)
         self.db = DatabaseManager()
+        #int8 vectors differ slightly from fp32 ones, so each backend has its own cache
+        cache_name = model_name if self.backend == 'torch' else f"{model_name}-onnx-int8"
+        self.embedding_cache = EmbeddingCache(cache_name)
+        self.threshold = 0.85  # 85% similarity score
+        self.top_k = top_k
+        self.block_size = block_size
+        self.use_ann = use_ann and faiss is not None
+
+        #resident index for matching at ingest time (see load_index)
+        self.index_ids = None
+        self.index_vendors = None
+        self.index_vectors = None
+        self.index_specs = None
+        self.index_size = 0
+
+    @staticmethod
+    def load_encoder(model_name, backend):
+        if backend == 'onnx':
+            from src.ai.onnx_encoder import OnnxEncoder
+            return OnnxEncoder(model_name)
+        if backend == 'torch':
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(model_name)
+        raise ValueError(f"Unknown embedding backend: {backend}")
 
     #get raw product names from mapping table
     def fetch_data(self):
@@ -33,28 +73,265 @@ class ProductMatcher:
             
         return df
 
-    #updates database by linking products with same id
-    def link_products(self, primary_id, secondary_id):
-        if primary_id == secondary_id:
-            return
+    #groups matched product ids into connected components
+    #the lowest (oldest) id in each cluster becomes the canonical id
+    @staticmethod
+    def build_clusters(id_pairs):
+        uf = UnionFind()
+        for a, b in id_pairs:
+            uf.union(int(a), int(b))
+        return {min(members): sorted(members) for members in uf.groups().values() if len(members) > 1}
+
+    #repoints every merged id at its canonical id in one transaction
+    def apply_merges(self, clusters):
+        remap = [(old_id, canonical) for canonical, members in clusters.items()
+                 for old_id in members if old_id != canonical]
+        if not remap:
+            return 0
 
         conn = self.db.get_connection()
         try:
             with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE product_mappings
-                    SET internal_product_id = %s
-                    WHERE internal_product_id = %s
-                """, (int(primary_id), int(secondary_id)))
+                execute_values(cur, """
+                    UPDATE product_mappings AS m
+                    SET internal_product_id = v.canonical_id
+                    FROM (VALUES %s) AS v(old_id, canonical_id)
+                    WHERE m.internal_product_id = v.old_id
+                """, remap, page_size=len(remap))
+                updated = cur.rowcount
             conn.commit()
-            print(f"   └── 💾 MERGED: Product ID {secondary_id} is now linked to ID {primary_id}")
+            print(f"   └── 💾 MERGED: {len(remap)} product ids into {len(clusters)} clusters ({updated} mappings updated)")
+            return updated
         except Exception as e:
+            conn.rollback()
             print(f"❌ Database Update Error: {e}")
+            return 0
         finally:
             conn.close()
 
+    @staticmethod
+    def report_clusters(clusters):
+        sizes = Counter(len(members) for members in clusters.values())
+        print(f"🧪 DRY RUN: {len(clusters)} clusters would be merged")
+        for size, count in sorted(sizes.items()):
+            print(f"   {count} cluster(s) of {size} products")
+
+    #cached embeddings, only names never seen before hit the model
+    def embed(self, names):
+        return self.embedding_cache.get_many(
+            names, lambda batch: self.model.encode(batch, convert_to_numpy=True))
+
+    #unit-length rows so a dot product is the cosine similarity
+    @staticmethod
+    def _normalize(embeddings):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+
+    #top-k neighbours per row: (rows, neighbour ids, scores), each shaped (n, k)
+    #vendor_codes / spec_codes: pairs that can never match (same vendor, conflicting
+    #specs) are scored -inf before the top-k, so near-duplicate listings from one
+    #vendor cannot crowd the real cross-vendor match out of the k slots
+    def _neighbours(self, embeddings, vendor_codes=None, spec_codes=None):
+        n = len(embeddings)
+        k = min(self.top_k + 1, n)  # +1 because every row finds itself
+
+        if self.use_ann:
+            #the graph search cannot mask pairs, so over-fetch and let _candidate_pairs filter
+            k = min(n, k * ANN_OVERFETCH)
+            index = faiss.IndexHNSWFlat(embeddings.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+            index.add(embeddings)
+            scores, cols = index.search(embeddings, k)
+            rows = np.repeat(np.arange(n)[:, None], k, axis=1)
+            return rows, cols, scores
+
+        rows, cols, scores = [], [], []
+        #one block of rows at a time keeps memory at block_size x n
+        for start in range(0, n, self.block_size):
+            block = embeddings[start:start + self.block_size] @ embeddings.T
+            stop = start + len(block)
+            if vendor_codes is not None:
+                block[vendor_codes[start:stop, None] == vendor_codes[None, :]] = -np.inf
+            if spec_codes is not None:
+                for field in range(spec_codes.shape[1]):
+                    a, b = spec_codes[start:stop, field, None], spec_codes[None, :, field]
+                    block[(a != -1) & (b != -1) & (a != b)] = -np.inf
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            rows.append(np.repeat(np.arange(start, stop)[:, None], k, axis=1))
+            cols.append(top)
+            scores.append(np.take_along_axis(block, top, axis=1))
+        return np.vstack(rows), np.vstack(cols), np.vstack(scores)
+
+    #parsed specs as an object matrix (rows x SPEC_FIELDS), None where unknown
+    @staticmethod
+    def _spec_matrix(specs):
+        return np.array([[spec[f] for f in SPEC_FIELDS] for spec in specs], dtype=object).reshape(len(specs), len(SPEC_FIELDS))
+
+    #per-field integer codes (-1 where unknown) for masking incompatible pairs
+    def _spec_codes(self, specs):
+        return np.column_stack([pd.factorize(column)[0] for column in self._spec_matrix(specs).T])
+
+    #neighbours searched inside each spec block only, mapped back to global row ids
+    def _blocked_neighbours(self, embeddings, blocks, vendor_codes, spec_codes):
+        rows, cols, scores = [], [], []
+        for block in blocks:
+            if len(block) < 2:
+                continue
+            block = np.asarray(block)
+            r, c, sc = self._neighbours(embeddings[block], vendor_codes[block], spec_codes[block])
+            r, c, sc = r.ravel(), c.ravel(), sc.ravel()
+            valid = c >= 0
+            rows.append(block[r[valid]])
+            cols.append(block[c[valid]])
+            scores.append(sc[valid])
+        if not rows:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(cols), np.concatenate(scores)
+
+    #candidate pairs above the threshold from different vendors with compatible specs,
+    #each pair once (i < j)
+    def _candidate_pairs(self, embeddings, vendors, specs=None):
+        vendor_codes = pd.factorize(vendors)[0]
+        spec_codes = self._spec_codes(specs) if specs is not None else None
+        if specs is None:
+            rows, cols, scores = self._neighbours(embeddings, vendor_codes)
+            rows, cols, scores = rows.ravel(), cols.ravel(), scores.ravel()
+        else:
+            blocks = build_blocks(specs)
+            compared = sum(len(b) ** 2 for b in blocks)
+            print(f"🧱 {len(blocks)} spec blocks: {compared:,} comparisons instead of {len(embeddings) ** 2:,}")
+            rows, cols, scores = self._blocked_neighbours(embeddings, blocks, vendor_codes, spec_codes)
+
+        #masked pairs can still fill spare top-k slots (as -inf), and the ANN path is unmasked
+        keep = (cols >= 0) & (rows != cols) & (scores > self.threshold)
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+        keep = vendor_codes[rows] != vendor_codes[cols]
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+        if specs is not None:
+            #8GB vs 16GB (or i5 vs i7, ...) never merge, whatever the embedding says
+            a, b = spec_codes[rows], spec_codes[cols]
+            keep = ((a == -1) | (b == -1) | (a == b)).all(axis=1)
+            rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+        #a pair can be found from both ends, keep one copy
+        i, j = np.minimum(rows, cols), np.maximum(rows, cols)
+        order = np.lexsort((j, i))
+        i, j, scores = i[order], j[order], scores[order]
+        first = np.ones(len(i), dtype=bool)
+        first[1:] = (i[1:] != i[:-1]) | (j[1:] != j[:-1])
+        return i[first], j[first], scores[first]
+
+    #upserts parsed specs per product, filling fields earlier runs could not parse
+    def store_specs(self, product_ids, specs):
+        latest = {}
+        for pid, spec in zip(product_ids, specs):
+            merged = latest.setdefault(int(pid), dict.fromkeys(SPEC_FIELDS))
+            for field in SPEC_FIELDS:
+                if merged[field] is None:
+                    merged[field] = spec[field]
+        rows = [(pid, *(spec[f] for f in SPEC_FIELDS)) for pid, spec in latest.items()]
+        if not rows:
+            return
+
+        conn = self.db.get_connection()
+        try:
+            with conn.cursor() as cur:
+                execute_values(cur, """
+                    INSERT INTO product_specs (product_id, brand, cpu_family, cpu_gen, ram_gb, storage_gb, gpu)
+                    VALUES %s
+                    ON CONFLICT (product_id) DO UPDATE SET
+                        brand = COALESCE(EXCLUDED.brand, product_specs.brand),
+                        cpu_family = COALESCE(EXCLUDED.cpu_family, product_specs.cpu_family),
+                        cpu_gen = COALESCE(EXCLUDED.cpu_gen, product_specs.cpu_gen),
+                        ram_gb = COALESCE(EXCLUDED.ram_gb, product_specs.ram_gb),
+                        storage_gb = COALESCE(EXCLUDED.storage_gb, product_specs.storage_gb),
+                        gpu = COALESCE(EXCLUDED.gpu, product_specs.gpu)
+                """, rows, page_size=1000)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"⚠️ Could not store product specs: {e}")
+        finally:
+            conn.close()
+
+    #keeps every known name variant embedded in memory for match_new_product
+    def load_index(self):
+        df = self.fetch_data()
+        if df.empty:
+            self.index_ids = np.empty(0, dtype=np.int64)
+            self.index_vendors = np.empty(0, dtype=object)
+            self.index_vectors = None
+            self.index_size = 0
+            return 0
+
+        self._set_index(df['internal_product_id'].to_numpy(dtype=np.int64),
+                        df['vendor'].to_numpy(dtype=object),
+                        self._normalize(self.embed(df['name'].tolist())),
+                        self._spec_matrix([extract_specs(name) for name in df['name']]))
+        print(f"🧠 Matcher index ready ({len(self.index_ids)} name variants)")
+        return len(self.index_ids)
+
+    #the index lives in buffers with spare capacity; index_* are views of the filled rows
+    def _set_index(self, ids, vendors, vectors, specs):
+        self._index_buffers = [ids, vendors, vectors, specs]
+        self.index_size = len(ids)
+        self._sync_index_views()
+
+    def _sync_index_views(self):
+        n = self.index_size
+        self.index_ids, self.index_vendors, self.index_vectors, self.index_specs = (
+            buffer[:n] for buffer in self._index_buffers)
+
+    #canonical product id for a newly scraped name, or None when nothing matches
+    def match_new_product(self, name, vendor):
+        vector = self._normalize(self.embed([name]))[0]
+        if self.index_vectors is None:
+            return None, (vector, name)
+
+        scores = self.index_vectors @ vector
+        scores[self.index_vendors == vendor] = -1.0  # only link across vendors
+        for k, value in enumerate(self._spec_matrix([extract_specs(name)])[0]):
+            if value is not None:
+                column = self.index_specs[:, k]
+                scores[pd.notna(column) & (column != value)] = -1.0
+        best = int(np.argmax(scores))
+        if scores[best] <= self.threshold:
+            return None, (vector, name)
+        return int(self.index_ids[best]), (vector, name)
+
+    #adds a registered name to the resident index
+    #entry is the second value returned by match_new_product
+    #buffers double when full, so a harvest of n new products copies O(n) rows, not O(n^2)
+    def remember(self, product_id, vendor, entry):
+        if self.index_ids is None:
+            return
+        vector, name = entry
+        if self.index_vectors is None:
+            self._set_index(np.empty(0, dtype=np.int64), np.empty(0, dtype=object),
+                            np.empty((0, len(vector)), dtype=np.float32),
+                            np.empty((0, len(SPEC_FIELDS)), dtype=object))
+
+        n = self.index_size
+        if n == len(self._index_buffers[0]):
+            capacity = max(16, 2 * n)
+            grown = []
+            for buffer in self._index_buffers:
+                new = np.empty((capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+                new[:n] = buffer[:n]
+                grown.append(new)
+            self._index_buffers = grown
+
+        ids, vendors, vectors, specs = self._index_buffers
+        ids[n], vendors[n], vectors[n] = product_id, vendor, vector
+        specs[n] = self._spec_matrix([extract_specs(name)])[0]
+        self.index_size = n + 1
+        self._sync_index_views()
+
     #Core AI logic
-    def find_matches(self):
+    def find_matches(self, dry_run=False):
         df = self.fetch_data()
         
         if df.empty:
@@ -64,36 +341,33 @@ class ProductMatcher:
         print(f"📊 Analyzing {len(df)} products...")
 
         #embeddings
-        raw_embeddings = self.model.encode(df['name'].tolist(), convert_to_numpy=True)
-        embeddings = np.array(raw_embeddings)
+        embeddings = self._normalize(self.embed(df['name'].tolist()))
 
-        #calculate similarity
-        #compare every product against every other product
-        similarity_matrix = cosine_similarity(embeddings)
+        #only names with compatible brand/CPU/RAM/storage/GPU are compared
+        specs = [extract_specs(name) for name in df['name']]
 
-        #identify matches
-        threshold = 0.85  # 85% similarity score
-        
+        #nearest neighbours in blocks instead of the full n x n matrix
+        pair_i, pair_j, pair_scores = self._candidate_pairs(embeddings, df['vendor'].to_numpy(), specs)
+
+        names = df['name'].to_numpy()
+        vendors = df['vendor'].to_numpy()
+        product_ids = df['internal_product_id'].to_numpy()
         matches_found = []
 
-        for i in range(len(df)):
-            for j in range(i + 1, len(df)): # Avoid duplicate pairs
-                score = similarity_matrix[i][j]
-                
-                if score > threshold:
-                    prod_a = df.iloc[i]
-                    prod_b = df.iloc[j]
-                    
-                    # Only use when from different vendors
-                    if prod_a['vendor'] != prod_b['vendor']:
-                        
-                        self.link_products(prod_a['internal_product_id'], prod_b['internal_product_id'])
-
-                        matches_found.append({
-                            "Product A": f"{prod_a['name']} ({prod_a['vendor']})",
-                            "Product B": f"{prod_b['name']} ({prod_b['vendor']})",
-                            "Score": f"{score:.2f}"
-                        })
+        for i, j, score in zip(pair_i, pair_j, pair_scores):
+            matches_found.append({
+                "Product A": f"{names[i]} ({vendors[i]})",
+                "Product B": f"{names[j]} ({vendors[j]})",
+                "Score": f"{score:.2f}"
+            })
+
+        #chains like A~B, B~C end up in one cluster
+        clusters = self.build_clusters(zip(product_ids[pair_i], product_ids[pair_j]))
+        if dry_run:
+            self.report_clusters(clusters)
+        else:
+            self.store_specs(product_ids, specs)
+            self.apply_merges(clusters)
 
         #get results
         print(f"\n✅ Analysis Complete. Found {len(matches_found)} matches.\n")
@@ -104,5 +378,10 @@ class ProductMatcher:
             print("-" * 50)
 
 if __name__ == "__main__":
-    matcher = ProductMatcher()
-    matcher.find_matches()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Link the same product across vendors")
+    parser.add_argument("--dry-run", action="store_true", help="report cluster sizes without updating the database")
+    parser.add_argument("--backend", choices=["torch", "onnx"], help="embedding backend (default: EMBEDDING_BACKEND or torch)")
+    args = parser.parse_args()
+
+    matcher = ProductMatcher(backend=args.backend)
+    matcher.find_matches(dry_run=args.dry_run)
\ No newline at end of file
@@ -0,0 +1,143 @@
+import re
+
+SPEC_FIELDS = ('brand', 'cpu_family', 'cpu_gen', 'ram_gb', 'storage_gb', 'gpu')
+
+BRANDS = {
+    'asus': 'asus', 'rog': 'asus', 'tuf': 'asus', 'vivobook': 'asus', 'zenbook': 'asus',
+    'lenovo': 'lenovo', 'ideapad': 'lenovo', 'thinkpad': 'lenovo', 'thinkbook': 'lenovo', 'legion': 'lenovo', 'loq': 'lenovo',
+    'hp': 'hp', 'victus': 'hp', 'pavilion': 'hp', 'omen': 'hp', 'elitebook': 'hp', 'probook': 'hp',
+    'dell': 'dell', 'inspiron': 'dell', 'vostro': 'dell', 'latitude': 'dell', 'alienware': 'dell',
+    'acer': 'acer', 'aspire': 'acer', 'nitro': 'acer', 'predator': 'acer', 'swift': 'acer',
+    'msi': 'msi', 'apple': 'apple', 'macbook': 'apple', 'samsung': 'samsung', 'huawei': 'huawei',
+    'microsoft': 'microsoft', 'surface': 'microsoft', 'gigabyte': 'gigabyte', 'avita': 'avita',
+    'infinix': 'infinix', 'chuwi': 'chuwi', 'xiaomi': 'xiaomi', 'redmi': 'xiaomi',
+}
+
+INTEL_RE = re.compile(r'\b(?:core\s*)?(i[3579])\s*-?\s*(\d{4,5})[a-z]{0,3}\d?\b')
+INTEL_GEN_RE = re.compile(r'\b(i[3579])\b.*?\b(\d{1,2})(?:st|nd|rd|th)\s*gen')
+ULTRA_RE = re.compile(r'\bultra\s*([579])\s*-?\s*(\d)(\d{2})[a-z]{0,2}\b')
+RYZEN_RE = re.compile(r'\bryzen\s*([3579])\s*-?\s*(?:pro\s*)?(\d)(\d{3})[a-z]{0,2}\b')
+APPLE_RE = re.compile(r'\bm([1-4])\s*(pro|max)?\b')
+CAPACITY_RE = re.compile(r'(\d{1,4})\s*(gb|tb)\b\s*([a-z]*)')
+GPU_RE = re.compile(r'\b(rtx|gtx|mx)\s*-?\s*(\d{3,4})\b|\brx\s*-?\s*(\d{4})m?\b|\barc\s*(a\d{3})m?\b')
+
+RAM_SIZES = {4, 8, 12, 16, 18, 24, 32, 36, 48, 64}
+STORAGE_WORDS = ('ssd', 'hdd', 'nvme', 'emmc', 'storage', 'rom', 'pcie', 'm2')
+RAM_WORDS = ('ram', 'ddr', 'lpddr', 'memory', 'unified')
+#"RTX 4060 8GB", "8GB GDDR6", "4GB VRAM": graphics memory, not system RAM
+GPU_BEFORE_RE = re.compile(r'(?:\b(?:rtx|gtx|mx|rx)\s*-?\s*\d{3,4}m?|\barc\s*a\d{3}m?|graphics|gpu)\s*[-(]?\s*$')
+VRAM_WORDS = ('gddr', 'vram', 'graphic', 'video', 'dedicated')
+
+
+def _intel_gen(model):
+    #12450 -> 12, 1135 -> 11, 8250 -> 8
+    if len(model) == 5 or model.startswith('1'):
+        return int(model[:2])
+    return int(model[0])
+
+
+#parses brand, CPU family/generation, RAM, storage and GPU out of a listing title
+#unknown fields are None
+def extract_specs(name):
+    text = str(name).lower()
+    specs = dict.fromkeys(SPEC_FIELDS)
+
+    for word in re.findall(r'[a-z]+', text):
+        if word in BRANDS:
+            specs['brand'] = BRANDS[word]
+            break
+
+    match = INTEL_RE.search(text)
+    if match:
+        specs['cpu_family'], specs['cpu_gen'] = match.group(1), _intel_gen(match.group(2))
+    elif (match := ULTRA_RE.search(text)):
+        specs['cpu_family'], specs['cpu_gen'] = f"ultra{match.group(1)}", int(match.group(2))
+    elif (match := RYZEN_RE.search(text)):
+        specs['cpu_family'], specs['cpu_gen'] = f"ryzen{match.group(1)}", int(match.group(2))
+    elif (match := INTEL_GEN_RE.search(text)):
+        specs['cpu_family'], specs['cpu_gen'] = match.group(1), int(match.group(2))
+    elif specs['brand'] == 'apple' and (match := APPLE_RE.search(text)):
+        specs['cpu_family'], specs['cpu_gen'] = f"m{match.group(1)}{match.group(2) or ''}", int(match.group(1))
+
+    #a size labelled RAM/DDR/memory wins over a bare one ("16GB" could be anything)
+    labelled_ram, bare_ram = None, None
+    for match in CAPACITY_RE.finditer(text):
+        size = int(match.group(1)) * (1024 if match.group(2) == 'tb' else 1)
+        after = match.group(3)
+        if after.startswith(VRAM_WORDS) or GPU_BEFORE_RE.search(text[max(0, match.start() - 20):match.start()]):
+            continue
+        is_storage = size >= 128 or after.startswith(STORAGE_WORDS)
+        if is_storage:
+            if specs['storage_gb'] is None:
+                specs['storage_gb'] = size
+        elif after.startswith(RAM_WORDS):
+            labelled_ram = labelled_ram or size
+        elif size in RAM_SIZES:
+            bare_ram = bare_ram or size
+    specs['ram_gb'] = labelled_ram or bare_ram
+
+    match = GPU_RE.search(text)
+    if match:
+        if match.group(1):
+            specs['gpu'] = f"{match.group(1)}{match.group(2)}"
+        elif match.group(3):
+            specs['gpu'] = f"rx{match.group(3)}"
+        else:
+            specs['gpu'] = f"arc{match.group(4)}"
+
+    return specs
+
+
+#False only when both sides know a field and disagree
+def specs_compatible(a, b, fields=SPEC_FIELDS):
+    return all(a[f] is None or b[f] is None or a[f] == b[f] for f in fields)
+
+
+#index groups of rows that may match each other
+#rows with every blocking field known go to that block; rows missing a field
+#join every block they are compatible with, plus a shared block of their own
+def build_blocks(specs_list, fields=('brand', 'ram_gb')):
+    blocks, partial = {}, []
+    for i, specs in enumerate(specs_list):
+        key = tuple(specs[f] for f in fields)
+        if None in key:
+            partial.append((i, key))
+        else:
+            blocks.setdefault(key, []).append(i)
+
+    for i, key in partial:
+        for block_key, members in blocks.items():
+            if all(k is None or k == bk for k, bk in zip(key, block_key)):
+                members.append(i)
+    if partial:
+        blocks[None] = [i for i, _ in partial]
+    return list(blocks.values())
+
+
+#titles from real listings whose parse once went wrong: python src/ai/spec_parser.py
+PARSER_CHECKS = [
+    ("ASUS TUF Gaming F15 RTX 4060 8GB i7-13620H 16GB RAM 512GB SSD",
+     {'brand': 'asus', 'cpu_family': 'i7', 'cpu_gen': 13, 'ram_gb': 16, 'storage_gb': 512, 'gpu': 'rtx4060'}),
+    ("Lenovo LOQ 15IAX9 i5-12450HX 8GB GDDR6 RTX 3050 / 16GB DDR5 / 512GB NVMe",
+     {'ram_gb': 16, 'storage_gb': 512, 'gpu': 'rtx3050'}),
+    ("MSI Katana 15 (Core i7-13620H, 4GB VRAM, 8GB, 1TB, RTX 2050)",
+     {'ram_gb': 8, 'storage_gb': 1024}),
+    ("HP Victus 15 Ryzen 5 7535HS 8GB RTX 4050 6GB 512GB SSD",
+     {'cpu_family': 'ryzen5', 'ram_gb': 8, 'storage_gb': 512, 'gpu': 'rtx4050'}),
+    ("Dell Inspiron 3520 i3-1215U 8GB 256GB SSD",
+     {'brand': 'dell', 'cpu_gen': 12, 'ram_gb': 8, 'storage_gb': 256, 'gpu': None}),
+]
+
+
+if __name__ == "__main__":
+    failures = 0
+    for title, expected in PARSER_CHECKS:
+        specs = extract_specs(title)
+        wrong = {k: (v, specs[k]) for k, v in expected.items() if specs[k] != v}
+        if wrong:
+            failures += 1
+            print(f"❌ {title}")
+            for field, (want, got) in wrong.items():
+                print(f"      {field}: expected {want!r}, got {got!r}")
+    print(f"{'✅' if not failures else '⚠️'} {len(PARSER_CHECKS) - failures}/{len(PARSER_CHECKS)} parser checks passed")
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.database.db_manager import DatabaseManager
+from src.pipeline.daemon import RunLock
+
+#consecutive rows of one listing (product, vendor and URL) with the same price and stock form a run;
+#each run keeps its first row, stretched to the run's last scrape
+RUNS_SQL = """
+    CREATE TEMP TABLE price_runs ON COMMIT DROP AS
+    SELECT id, product_id, vendor_name, product_url, scraped_at, COALESCE(valid_to, scraped_at) AS last_seen, observations,
+           SUM(changed) OVER (PARTITION BY product_id, vendor_name, product_url ORDER BY scraped_at) AS run
+    FROM (
+        SELECT id, product_id, vendor_name, product_url, scraped_at, valid_to, observations,
+               CASE WHEN price IS DISTINCT FROM LAG(price) OVER w
+                      OR is_in_stock IS DISTINCT FROM LAG(is_in_stock) OVER w THEN 1 ELSE 0 END AS changed
+        FROM market_data
+        WINDOW w AS (PARTITION BY product_id, vendor_name, product_url ORDER BY scraped_at)
+    ) marked
+"""
+
+SPANS_SQL = """
+    CREATE TEMP TABLE price_spans ON COMMIT DROP AS
+    SELECT (ARRAY_AGG(id ORDER BY scraped_at))[1] AS keep_id,
+           MAX(last_seen) AS valid_to,
+           SUM(observations) AS observations,
+           COUNT(*) AS row_count
+    FROM price_runs
+    GROUP BY product_id, vendor_name, product_url, run
+"""
+
+
+#rewrites one-row-per-scrape history into change-only intervals (PRICE_STORAGE=intervals)
+#returns (rows before, rows after); dry_run only counts
+def compact(db, dry_run=False):
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(RUNS_SQL)
+            cur.execute(SPANS_SQL)
+            cur.execute("SELECT COUNT(*), COALESCE(SUM(row_count), 0) FROM price_spans")
+            after, before = cur.fetchone()
+            if dry_run or after == before:
+                conn.rollback()
+                return int(before), int(after)
+
+            cur.execute("""
+                UPDATE market_data m
+                SET valid_to = s.valid_to, observations = s.observations
+                FROM price_spans s
+                WHERE m.id = s.keep_id
+            """)
+            cur.execute("""
+                DELETE FROM market_data m
+                USING price_runs r
+                WHERE m.id = r.id
+                  AND NOT EXISTS (SELECT 1 FROM price_spans s WHERE s.keep_id = r.id)
+            """)
+        conn.commit()
+        return int(before), int(after)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collapse unchanged market_data rows into price intervals")
+    parser.add_argument("--dry-run", action="store_true", help="report how many rows would remain without changing anything")
+    args = parser.parse_args()
+
+    #refuses to run while a harvest or matching run holds the ingest lock
+    with RunLock("ingest"):
+        before, after = compact(DatabaseManager(), args.dry_run)
+    saved = (1 - after / before) * 100 if before else 0.0
+    verb = "would shrink" if args.dry_run else "shrank"
+    print(f"{'📊' if args.dry_run else '✅'} market_data {verb} from {before:,} to {after:,} rows ({saved:.1f}% fewer)")
+    if not args.dry_run and before != after:
+        print("   Set PRICE_STORAGE=intervals so new scrapes keep extending these rows")
@@ -1,18 +1,50 @@
 import psycopg2
+import psycopg2.extensions
 import os
+import time
+import logging
 from dotenv import load_dotenv
 from datetime import datetime
+from src.monitoring.metrics import QUERY_LATENCY, QUERY_ERRORS, query_label
 
 load_dotenv()
 
+#queries slower than this are logged (0 disables the slow-query log)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+slow_query_log = logging.getLogger("marketpulse.slow_query")
+
+#'rows': one market_data row per scrape
+#'intervals': a new row only when price or stock changed, otherwise the current row's
+#valid_to is extended (read daily series through the market_data_daily view)
+PRICE_STORAGE = os.getenv("PRICE_STORAGE", "rows")
+
+#cursor that times every statement into the /metrics registry
+class TimedCursor(psycopg2.extensions.cursor):
+    def execute(self, query, vars=None):
+        label = query_label(query)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        except Exception:
+            QUERY_ERRORS.inc(label)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            QUERY_LATENCY.observe(elapsed, label)
+            if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+                slow_query_log.warning(f"{elapsed * 1000:.1f} ms: {label}")
+
 class DatabaseManager:
-    def __init__(self):
+    #matcher: optional resident ProductMatcher (with load_index() done) that
+    #links new products to an existing canonical id as they are registered
+    def __init__(self, matcher=None):
         self.dbname = os.getenv("DB_NAME", "marketpulse")
         self.user = os.getenv("DB_USER", "postgres")
         self.password = os.getenv("DB_PASSWORD")
         self.host = os.getenv("DB_HOST", "127.0.0.1")
         self.port = os.getenv("DB_PORT", "5433") 
         self.conn = None
+        self.matcher = matcher
 
     #returns raw database connection
     def get_connection(self):
@@ -21,7 +53,8 @@ class DatabaseManager:
             database=self.dbname,
             user=self.user,
             password=self.password,
-            port=self.port
+            port=self.port,
+            cursor_factory=TimedCursor
         )    
 
     #connect to database
@@ -35,7 +68,8 @@ class DatabaseManager:
                 user=self.user,
                 password=self.password,
                 host=self.host,
-                port=self.port
+                port=self.port,
+                cursor_factory=TimedCursor
             )
             return self.conn
         except Exception as e:
@@ -47,67 +81,166 @@ class DatabaseManager:
             self.conn.close()
             print("Database connection closed.")
 
-    #takes scraper data and save to database
-    def save_scraped_data(self, data: dict):
-        if not data or not data.get('price'):
-            return
-
-        conn = self.connect()
-        if not conn: return
-
+    #rebuilds the daily_prices rollup (dashboard chart, daily forecasting histories)
+    #run after every harvest and matching run, and hourly by the daemon
+    def refresh_daily_prices(self):
+        conn = self.get_connection()
         try:
+            conn.autocommit = True
             with conn.cursor() as cur:
-                scraped_name = data['name'].strip()
-                vendor = data['vendor']
-                
+                cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY daily_prices")
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not refresh daily_prices: {e}")
+            return False
+        finally:
+            conn.close()
+
+    #asks the resident matcher for a canonical id; never fails the save
+    def _match_on_ingest(self, name, vendor):
+        if not self.matcher:
+            return None, None
+        try:
+            return self.matcher.match_new_product(name, vendor)
+        except Exception as e:
+            print(f"⚠️ Ingest matching skipped: {e}")
+            return None, None
+
+    #writes one scraped item with the given cursor (no commit)
+    #returns the matcher index entry for a newly registered variant, if any
+    def _save_row(self, cur, data):
+        scraped_name = data['name'].strip()
+        vendor = data['vendor']
+        new_variant = None
+        
+        cur.execute("""
+            SELECT internal_product_id FROM product_mappings 
+            WHERE external_name_variant = %s AND vendor_name = %s
+        """, (scraped_name, vendor))
+        
+        result = cur.fetchone()
+
+        if result:
+            #A: known product
+            product_id = result[0]
+        else:
+            #B: new product
+            canonical_id, index_entry = self._match_on_ingest(scraped_name, vendor)
+
+            if canonical_id:
+                #same product already sold by another vendor, reuse its id
+                product_id = canonical_id
+            else:
+                #create new entry in products table
                 cur.execute("""
-                    SELECT internal_product_id FROM product_mappings 
-                    WHERE external_name_variant = %s AND vendor_name = %s
-                """, (scraped_name, vendor))
+                    INSERT INTO products (name, category, created_at)
+                    VALUES (%s, 'Uncategorized', NOW())
+                    RETURNING id
+                """, (scraped_name,))
                 
-                result = cur.fetchone()
-
-                if result:
-                    #A: known product
-                    product_id = result[0]
-                else:
-                    #B: new product
-                    #create new entry in products table
-                    cur.execute("""
-                        INSERT INTO products (name, category, created_at)
-                        VALUES (%s, 'Uncategorized', NOW())
-                        RETURNING id
-                    """, (scraped_name,))
-                    
-                    new_row = cur.fetchone()
-                    if new_row:
-                        product_id = new_row[0]
-                    else:
-                        print(f"❌ Error: Database did not return an ID for {scraped_name}")
-                        return 
-
-
-                    #link to 'product_mappings'
-                    cur.execute("""
-                        INSERT INTO product_mappings (internal_product_id, external_name_variant, vendor_name)
-                        VALUES (%s, %s, %s)
-                    """, (product_id, scraped_name, vendor))
-                    
-                    print(f"🆕 New Product Registered: {scraped_name}")
-
-                #input price history
+                new_row = cur.fetchone()
+                if not new_row:
+                    raise RuntimeError(f"Database did not return an ID for {scraped_name}")
+                product_id = new_row[0]
+
+
+            #link to 'product_mappings'
+            cur.execute("""
+                INSERT INTO product_mappings (internal_product_id, external_name_variant, vendor_name)
+                VALUES (%s, %s, %s)
+            """, (product_id, scraped_name, vendor))
+            
+            if canonical_id:
+                print(f"🔗 New Product Linked: {scraped_name} -> ID {canonical_id}")
+            else:
+                print(f"🆕 New Product Registered: {scraped_name}")
+            if index_entry is not None:
+                new_variant = (product_id, vendor, index_entry)
+
+        #input price history
+        #returns (index entry to remember, whether a price row was written or extended)
+        if PRICE_STORAGE == 'intervals':
+            #needs SQL/migrate_price_intervals.sql on databases created before intervals
+            if not self._extend_interval(cur, product_id, vendor, data):
                 cur.execute("""
-                    INSERT INTO market_data (product_id, vendor_name, price, is_in_stock, product_url, scraped_at)
-                    VALUES (%s, %s, %s, %s, %s, NOW())
+                    INSERT INTO market_data (product_id, vendor_name, price, is_in_stock, product_url, scraped_at, valid_to)
+                    VALUES (%s, %s, %s, %s, %s, clock_timestamp(), clock_timestamp())
                     ON CONFLICT (product_id, vendor_name, scraped_at) DO NOTHING
                 """, (product_id, vendor, data['price'], data['is_in_stock'], data['url']))
+                return new_variant, cur.rowcount > 0
+            return new_variant, True
+        #clock_timestamp(): rows of one batch share a transaction, and NOW() would
+        #give two listings of the same product identical keys
+        cur.execute("""
+            INSERT INTO market_data (product_id, vendor_name, price, is_in_stock, product_url, scraped_at)
+            VALUES (%s, %s, %s, %s, %s, clock_timestamp())
+            ON CONFLICT (product_id, vendor_name, scraped_at) DO NOTHING
+        """, (product_id, vendor, data['price'], data['is_in_stock'], data['url']))
+        return new_variant, cur.rowcount > 0
 
-            conn.commit()
-            print(f"✅ Saved: {data['name']} | Rs. {data['price']}")
+    #stretches the listing's current interval when price and stock are unchanged; False means a new row is needed
+    #keyed on the URL too: variant listings merged into one product keep separate intervals
+    @staticmethod
+    def _extend_interval(cur, product_id, vendor, data):
+        cur.execute("""
+            UPDATE market_data
+            SET valid_to = NOW(), observations = observations + 1
+            WHERE id = (
+                SELECT id FROM market_data
+                WHERE product_id = %s AND vendor_name = %s AND product_url IS NOT DISTINCT FROM %s
+                ORDER BY scraped_at DESC LIMIT 1
+            )
+            AND price = %s AND is_in_stock = %s
+        """, (product_id, vendor, data['url'], data['price'], data['is_in_stock']))
+        return cur.rowcount > 0
+
+    #takes scraper data and save to database
+    def save_scraped_data(self, data: dict):
+        return self.save_scraped_batch([data])[0] == 'saved'
 
+    #saves many items in one transaction; a failing item is rolled back to its
+    #savepoint without losing the rest. returns 'saved', 'skipped' (a row with the
+    #same key already existed) or 'failed' per item
+    def save_scraped_batch(self, items):
+        outcomes = ['failed'] * len(items)
+        if not items: return outcomes
+
+        conn = self.connect()
+        if not conn: return outcomes
+        new_variants = []
+
+        try:
+            with conn.cursor() as cur:
+                for i, data in enumerate(items):
+                    if not data or not data.get('price'):
+                        continue
+                    cur.execute("SAVEPOINT scraped_item")
+                    try:
+                        new_variant, stored = self._save_row(cur, data)
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT scraped_item")
+                        print(f"❌ Error Saving Data: {e}")
+                        continue
+                    cur.execute("RELEASE SAVEPOINT scraped_item")
+                    outcomes[i] = 'saved' if stored else 'skipped'
+                    if new_variant:
+                        new_variants.append(new_variant)
+
+            conn.commit()
         except Exception as e:
             conn.rollback()
             print(f"❌ Error Saving Data: {e}")
+            return ['failed'] * len(items)
+
+        #only index names whose registration was committed
+        for new_variant in new_variants:
+            self.matcher.remember(*new_variant)
+        for data, outcome in zip(items, outcomes):
+            if outcome == 'saved':
+                print(f"✅ Saved: {data['name']} | Rs. {data['price']}")
+            elif outcome == 'skipped':
+                print(f"⏭️ Already recorded: {data['name']}")
+        return outcomes
 
 # Self-test block
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from src.monitoring.metrics import record_cache
+
+#splits "ASUS TUF RTX4060" into asus, tuf, rtx4060, rtx, 4060
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+PART_RE = re.compile(r'[a-z]+|\d+')
+
+
+def tokenize(text):
+    tokens = set()
+    for word in TOKEN_RE.findall(text.lower()):
+        tokens.add(word)
+        parts = PART_RE.findall(word)
+        if len(parts) > 1:
+            tokens.update(parts)
+    return tokens
+
+
+def char_ngrams(token, n=3):
+    padded = f" {token} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+#in-process search over products.name and product_mappings.external_name_variant
+#token -> product ids for exact hits, trigram -> tokens for typo tolerance
+class ProductSearchIndex:
+    def __init__(self, fuzzy_threshold=0.4, min_coverage=0.6, refresh_seconds=60):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.min_coverage = min_coverage
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.postings = defaultdict(set)     # token -> {product_id}
+        self.gram_tokens = defaultdict(set)  # trigram -> {token}
+        self.product_ids = set()
+        self.last_product_id = 0
+        self.last_mapping_id = 0
+        #(products, mappings, sum of mapped ids) as the index believes them to be
+        self.signature = (0, 0, 0)
+        self.refreshed_at = 0.0
+        self._expansions = {}
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    #full rebuild from the database
+    def build(self, conn):
+        with self.lock:
+            self._reset()
+            self.refresh(conn, verify=False)
+            self.signature = self._signature(conn)
+
+    #counts that change whenever products are deleted or mappings are re-pointed
+    @staticmethod
+    def _signature(conn):
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT (SELECT COUNT(*) FROM products), COUNT(*), COALESCE(SUM(internal_product_id), 0)
+                FROM product_mappings
+            """)
+            return tuple(int(v) for v in cur.fetchone())
+
+    #pulls only rows added since the last build/refresh
+    #merges rewrite existing rows (internal_product_id, deleted products), which the
+    #id watermarks cannot see; verify compares the table signature against what the
+    #index has ingested and rebuilds from scratch when they disagree
+    def refresh(self, conn, verify=True):
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, name FROM products WHERE id > %s ORDER BY id", (self.last_product_id,))
+            products = cur.fetchall()
+            cur.execute("""
+                SELECT id, internal_product_id, external_name_variant
+                FROM product_mappings WHERE id > %s ORDER BY id
+            """, (self.last_mapping_id,))
+            mappings = cur.fetchall()
+
+        with self.lock:
+            for pid, name in products:
+                self.add(pid, name)
+                self.last_product_id = max(self.last_product_id, pid)
+            for mid, pid, variant in mappings:
+                if pid is not None:
+                    self.add(pid, variant)
+                self.last_mapping_id = max(self.last_mapping_id, mid)
+            count, mapped, id_sum = self.signature
+            self.signature = (count + len(products), mapped + len(mappings),
+                              id_sum + sum(pid or 0 for _, pid, _ in mappings))
+            self.refreshed_at = time.time()
+
+        if verify and self._signature(conn) != self.signature:
+            self.build(conn)
+            return len(self)
+        return len(products) + len(mappings)
+
+    #refresh only when the last one is older than refresh_seconds
+    def refresh_if_stale(self, conn):
+        if time.time() - self.refreshed_at >= self.refresh_seconds:
+            return self.refresh(conn)
+        return 0
+
+    def add(self, product_id, text):
+        with self.lock:
+            self.product_ids.add(product_id)
+            for token in tokenize(text or ""):
+                if token not in self.postings:
+                    for gram in char_ngrams(token):
+                        self.gram_tokens[gram].add(token)
+                self.postings[token].add(product_id)
+            self._expansions.clear()
+
+    #indexed tokens close to a query token, with their similarity
+    def _expand(self, token):
+        hit = token in self._expansions
+        record_cache('search_expansions', hit)
+        if hit:
+            return self._expansions[token]
+
+        matches = {}
+        if token in self.postings:
+            matches[token] = 1.0
+        if not token.isdigit():
+            #model numbers must match exactly, words may carry typos
+            grams = char_ngrams(token)
+            overlap = defaultdict(int)
+            for gram in grams:
+                for candidate in self.gram_tokens.get(gram, ()):
+                    overlap[candidate] += 1
+            for candidate, shared in overlap.items():
+                if candidate in matches or candidate.isdigit():
+                    continue
+                score = shared / (len(grams) + len(char_ngrams(candidate)) - shared)
+                if score >= self.fuzzy_threshold:
+                    matches[candidate] = score
+
+        self._expansions[token] = matches
+        return matches
+
+    #ranked product ids for a free-text query
+    def search(self, query, limit=200):
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        with self.lock:
+            total = max(len(self.product_ids), 1)
+            scores = defaultdict(float)
+            total_weight = 0.0
+
+            for token in query_tokens:
+                expansions = self._expand(token)
+                weight = max((self._idf(t, total) for t in expansions), default=math.log(total + 1))
+                total_weight += weight
+
+                best = {}
+                for candidate, similarity in expansions.items():
+                    gain = similarity * self._idf(candidate, total)
+                    for pid in self.postings[candidate]:
+                        if gain > best.get(pid, 0.0):
+                            best[pid] = gain
+                for pid, gain in best.items():
+                    scores[pid] += gain
+
+        cutoff = total_weight * self.min_coverage
+        ranked = sorted((pid for pid, score in scores.items() if score >= cutoff),
+                        key=lambda pid: scores[pid], reverse=True)
+        return ranked[:limit]
+
+    def _idf(self, token, total):
+        return math.log(1 + total / (1 + len(self.postings.get(token, ()))))
@@ -1,31 +1,78 @@
-from flask import Flask, render_template, url_for, request, jsonify
+from flask import Flask, render_template, url_for, request, jsonify, Response, stream_with_context
 import sys
 import os
+import json
+import queue
 import random
+import threading
+import time
+from functools import wraps
 from datetime import datetime, timedelta
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from src.database.db_manager import DatabaseManager
-from src.ai.price_predictor import PricePredictor
+from src.database.search_index import ProductSearchIndex
+from src.flask_app.jobs import JobManager, JobQueueFull
+from src.monitoring.metrics import REGISTRY, REQUEST_LATENCY, HELPER_LATENCY, HELPER_ERRORS
+from src.monitoring.progress import bus as progress_bus, ProgressListener
 
 app = Flask(__name__)
 db = DatabaseManager()
+jobs = JobManager(max_workers=int(os.getenv("FORECAST_WORKERS", "2")),
+                  max_pending=int(os.getenv("FORECAST_MAX_PENDING", "32")))
+BULK_ANALYZE_LIMIT = int(os.getenv("BULK_ANALYZE_LIMIT", "100"))
+search_index = ProductSearchIndex(refresh_seconds=int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "60")))
+
+#instrumentation
+@app.before_request
+def start_request_timer():
+    request.started_at = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = getattr(request, 'started_at', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, route, request.method, response.status_code)
+    return response
+
+#times a dashboard helper into /metrics
+def instrumented(helper):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with HELPER_LATENCY.time(helper):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+#counts and reports a helper failure, and clears the aborted transaction for the next helper
+def helper_failed(helper, conn, e):
+    HELPER_ERRORS.inc(helper)
+    print(f"⚠️ {helper} failed: {e}")
+    try:
+        conn.rollback()
+    except Exception:
+        pass
 
 #helpers
+@instrumented('get_chart_data')
 def get_chart_data(conn):
     dates, prices = [], []
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT DATE(scraped_at) as day, AVG(price) FROM market_data GROUP BY day ORDER BY day DESC LIMIT 7")
+            #daily_prices is refreshed after every harvest, no need to expand intervals per request
+            cur.execute("SELECT day, SUM(avg_price * samples) / SUM(samples) FROM daily_prices GROUP BY day ORDER BY day DESC LIMIT 7")
             rows = cur.fetchall()
             for r in rows:
                 dates.append(r[0].strftime('%b %d'))
                 prices.append(float(r[1]))
             dates.reverse()
             prices.reverse()
-    except: pass
+    except Exception as e: helper_failed('get_chart_data', conn, e)
     return dates, prices
 
+@instrumented('get_movers')
 def get_movers(conn):
     movers = []
     try:
@@ -49,9 +96,12 @@ def get_movers(conn):
                             })
             movers.sort(key=lambda x: x['abs_change'], reverse=True)
             return movers[:4] # Reduced to 4 to fit space
-    except: return []
+    except Exception as e:
+        helper_failed('get_movers', conn, e)
+        return []
 
 # NEW FUNCTION: Get specific out-of-stock items
+@instrumented('get_stock_alerts_list')
 def get_stock_alerts_list(conn):
     alerts = []
     try:
@@ -72,10 +122,11 @@ def get_stock_alerts_list(conn):
                     'vendor': r[1],
                     'price': f"LKR {float(r[2]):,.0f}"
                 })
-    except: pass
+    except Exception as e: helper_failed('get_stock_alerts_list', conn, e)
     return alerts
 
 #discovery feed
+@instrumented('get_discovery_feed')
 def get_discovery_feed(conn):
     feed_items = []
     try:
@@ -123,9 +174,21 @@ def get_discovery_feed(conn):
             if not feed_items:
                 feed_items = scored_items[:8]
                 
-    except: pass
+    except Exception as e: helper_failed('get_discovery_feed', conn, e)
     return feed_items
 
+#search index
+#pulls in products registered by harvests since the last refresh
+def refresh_search_index(conn):
+    try:
+        if len(search_index) == 0:
+            search_index.build(conn)
+        else:
+            search_index.refresh_if_stale(conn)
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ Search index refresh failed: {e}")
+
 #context processor
 @app.context_processor
 def inject_global_data():
@@ -135,12 +198,14 @@ def inject_global_data():
         with conn.cursor() as cur:
             cur.execute("SELECT DISTINCT vendor_name FROM market_data WHERE vendor_name != 'TestVendor' LIMIT 5")
             vendors = [row[0] for row in cur.fetchall()]
-    except: vendors = ['Demo: Amazon', 'Demo: BestBuy']
+    except Exception:
+        HELPER_ERRORS.inc('inject_global_data')
+        vendors = ['Demo: Amazon', 'Demo: BestBuy']
     
     if conn:
         conn.close()
         
-    return dict(vendor_list=vendors, server_status={'db': 'Online', 'ai': 'Ready v1.0', 'sync': 'Live'})
+    return dict(vendor_list=vendors, server_status={'db': 'Online', 'ai': 'Ready v1.0', 'sync': progress_bus.status()})
 
 #dashboard route
 @app.route('/')
@@ -157,7 +222,7 @@ def dashboard():
             res = cur.fetchone()
             if res: stats['products'] = res[0]
             
-            cur.execute("SELECT COUNT(*) FROM market_data WHERE is_in_stock = FALSE AND scraped_at > NOW() - INTERVAL '24 HOURS'")
+            cur.execute("SELECT COUNT(*) FROM market_data WHERE is_in_stock = FALSE AND COALESCE(valid_to, scraped_at) > NOW() - INTERVAL '24 HOURS'")
             res = cur.fetchone()
             if res: stats['stock_alerts'] = res[0]
 
@@ -174,6 +239,7 @@ def dashboard():
             movers_data = [{'short_name': 'Demo: Ryzen', 'price': 'LKR 125k', 'change': '+1%', 'trend': 'up'}]
 
     except Exception as e:
+        HELPER_ERRORS.inc('dashboard')
         print(f"Error: {e}")
     finally:
         if conn:
@@ -198,15 +264,28 @@ def price_explorer():
     try:
         with conn.cursor() as cur:
             if query:
-                #search
-                sql = """
-                    SELECT p.id, p.name, p.brand, m.price, m.vendor_name, m.is_in_stock
-                    FROM products p
-                    JOIN market_data m ON p.id = m.product_id
-                    WHERE p.name ILIKE %s
-                    ORDER BY m.price DESC
-                """
-                cur.execute(sql, (f'%{query}%',))
+                #search: rank ids in memory, hydrate only those rows
+                refresh_search_index(conn)
+                if len(search_index):
+                    sql = """
+                        SELECT p.id, p.name, p.brand, m.price, m.vendor_name, m.is_in_stock
+                        FROM products p
+                        JOIN market_data m ON p.id = m.product_id
+                        WHERE p.id = ANY(%s::int[])
+                        ORDER BY array_position(%s::int[], p.id), m.price DESC
+                    """
+                    ranked = search_index.search(query)
+                    cur.execute(sql, (ranked, ranked))
+                else:
+                    #index unavailable, fall back to a plain scan
+                    sql = """
+                        SELECT p.id, p.name, p.brand, m.price, m.vendor_name, m.is_in_stock
+                        FROM products p
+                        JOIN market_data m ON p.id = m.product_id
+                        WHERE p.name ILIKE %s
+                        ORDER BY m.price DESC
+                    """
+                    cur.execute(sql, (f'%{query}%',))
                 rows = cur.fetchall()
                 
                 results = []
@@ -227,14 +306,17 @@ def price_explorer():
                     search_stats['min'] = f"{min(prices):,.0f}"
                     search_stats['max'] = f"{max(prices):,.0f}"
 
-                #tier logic
+                #tier logic: price bands, listed in search relevance order within each band
                 count = len(results)
                 if count > 0:
                     p_end = count // 3
                     s_end = (count * 2) // 3
-                    tiers['premium']['listings'] = results[:p_end]
-                    tiers['standard']['listings'] = results[p_end:s_end]
-                    tiers['value']['listings'] = results[s_end:]
+                    by_price = sorted(results, key=lambda x: x['price'], reverse=True)
+                    band = {x['id']: 'premium' for x in by_price[:p_end]}
+                    band.update({x['id']: 'standard' for x in by_price[p_end:s_end]})
+                    band.update({x['id']: 'value' for x in by_price[s_end:]})
+                    for t in tiers:
+                        tiers[t]['listings'] = [x for x in results if band[x['id']] == t]
                     
                     for t in tiers:
                         lst = tiers[t]['listings']
@@ -248,6 +330,7 @@ def price_explorer():
                 watchlist = get_discovery_feed(conn)
 
     except Exception as e:
+        HELPER_ERRORS.inc('price_explorer')
         print(f"Error: {e}")
     finally:
 
@@ -261,14 +344,10 @@ def price_explorer():
                           search_stats=search_stats,
                           watchlist=watchlist)
 
-#routes api
-@app.route('/api/analyze_tier', methods=['POST'])
-def api_analyze_tier():
-    data = request.json
-    product_ids = data.get('ids', [])
-    predictor = PricePredictor()
-    result = predictor.predict_group(product_ids)
-    dates, prices, recommendation = [], [], "Insufficient Data"
+#forecast helpers
+#turns a predictor result into the chart payload the explorer expects
+def build_forecast_payload(result, empty_label):
+    dates, prices, recommendation = [], [], empty_label
     if result:
         current, target = result['current_price'], result['predicted_price_7_days']
         recommendation = result['recommendation']
@@ -282,27 +361,188 @@ def api_analyze_tier():
             prices.append(current + (step * i))
     else:
         for i in range(1,8): dates.append(f"Day {i}"); prices.append(0)
-    return jsonify({'dates': dates, 'prices': prices, 'recommendation': recommendation})
+    return {'dates': dates, 'prices': prices, 'recommendation': recommendation}
+
+#xgboost/pandas load on the first forecast, not when the dashboard starts
+def get_predictor():
+    from src.ai.price_predictor import PricePredictor
+    return PricePredictor()
+
+def run_tier_forecast(product_ids):
+    predictor = get_predictor()
+    return build_forecast_payload(predictor.predict_group(product_ids), "Insufficient Data")
+
+def run_single_forecast(product_id):
+    predictor = get_predictor()
+    return build_forecast_payload(predictor.predict_single(product_id), "No Data")
+
+def run_bulk_forecast(product_ids):
+    predictor = get_predictor()
+    results = predictor.predict_many(product_ids)
+    return {str(pid): build_forecast_payload(result, "No Data") for pid, result in results.items()}
+
+#job mode is requested with ?mode=job (or "mode": "job" in the POST body)
+def wants_job_mode(data=None):
+    mode = request.args.get('mode') or (data or {}).get('mode')
+    return mode == 'job'
+
+def submit_forecast_job(key, fn, *args):
+    try:
+        job_id, _ = jobs.submit(key, fn, *args)
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({
+        'job_id': job_id,
+        'status': jobs.get(job_id)['status'],
+        'poll_url': url_for('api_job_status', job_id=job_id),
+        'stream_url': url_for('api_job_stream', job_id=job_id),
+    }), 202
+
+#POST body as a dict: {} when there is none, None when it is not a JSON object
+def json_body():
+    if not request.get_data():
+        return {}
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
+
+#sorted unique product ids from the body's "ids" list, or None if it is not a list of integers
+def parse_product_ids(data):
+    ids = data.get('ids', []) if data is not None else None
+    if not isinstance(ids, list):
+        return None
+    try:
+        return sorted({int(pid) for pid in ids})
+    except (TypeError, ValueError):
+        return None
+
+#routes api
+@app.route('/api/analyze_tier', methods=['POST'])
+def api_analyze_tier():
+    data = json_body()
+    product_ids = parse_product_ids(data)
+    if product_ids is None:
+        return jsonify({'error': 'ids must be a list of product ids'}), 400
+    if wants_job_mode(data):
+        return submit_forecast_job(('tier', tuple(product_ids)), run_tier_forecast, product_ids)
+    return jsonify(run_tier_forecast(product_ids))
 
 @app.route('/api/analyze/<int:product_id>')
 def api_analyze_single(product_id):
-    predictor = PricePredictor()
-    result = predictor.predict_single(product_id)
-    dates, prices, recommendation = [], [], "No Data"
-    if result:
-        current, target = result['current_price'], result['predicted_price_7_days']
-        recommendation = result['recommendation']
-        if -1.0 <= result['percent_change'] <= 1.0:
-            target = current
-            recommendation = "⚖️ SAFE (Stable Market)"
-        step = (target - current) / 7
-        start = datetime.now()
-        for i in range(1, 8):
-            dates.append((start + timedelta(days=i)).strftime('%b %d'))
-            prices.append(current + (step * i))
-    else:
-        for i in range(1,8): dates.append(f"Day {i}"); prices.append(0)
-    return jsonify({'dates': dates, 'prices': prices, 'recommendation': recommendation})
+    if wants_job_mode():
+        return submit_forecast_job(('single', product_id), run_single_forecast, product_id)
+    return jsonify(run_single_forecast(product_id))
+
+#forecasts for many products in one request (one query, one feature pass)
+@app.route('/api/analyze_bulk', methods=['POST'])
+def api_analyze_bulk():
+    data = json_body()
+    product_ids = parse_product_ids(data)
+    if product_ids is None:
+        return jsonify({'error': 'ids must be a list of product ids'}), 400
+    if len(product_ids) > BULK_ANALYZE_LIMIT:
+        return jsonify({'error': f'At most {BULK_ANALYZE_LIMIT} ids per request'}), 400
+
+    if wants_job_mode(data):
+        return submit_forecast_job(('bulk', tuple(product_ids)), run_bulk_forecast, product_ids)
+    return jsonify({'forecasts': run_bulk_forecast(product_ids)})
+
+#poll a forecast job
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
+#stream a forecast job as Server-Sent Events, one event when it finishes
+@app.route('/api/jobs/<job_id>/stream')
+def api_job_stream(job_id):
+    if not jobs.get(job_id):
+        return jsonify({'error': 'Unknown job'}), 404
+
+    def generate():
+        while True:
+            job = jobs.wait(job_id, timeout=15)
+            if job is None:
+                yield "event: error\ndata: {\"error\": \"Job expired\"}\n\n"
+                return
+            if job['status'] in ('done', 'failed'):
+                yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+                return
+            #keep proxies from closing an idle connection
+            yield ": ping\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+#live harvest progress as Server-Sent Events
+@app.route('/api/harvest/stream')
+def api_harvest_stream():
+    q = progress_bus.subscribe()
+
+    def generate():
+        try:
+            if progress_bus.last_event:
+                yield f"event: progress\ndata: {json.dumps(progress_bus.last_event)}\n\n"
+            while True:
+                try:
+                    event = q.get(timeout=15)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+        finally:
+            progress_bus.unsubscribe(q)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+#Prometheus scrape endpoint
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+#build the search index in the background so the first search is fast
+def warm_search_index():
+    conn = None
+    try:
+        conn = db.get_connection()
+        search_index.build(conn)
+        print(f"🔍 Search index ready ({len(search_index)} products)")
+    except Exception as e:
+        print(f"⚠️ Search index not built at startup: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+#global forecasting mode serves a published model; load it before the first
+#forecast so that request does not pay for it (local mode keeps xgboost lazy)
+def warm_forecast_model():
+    if os.getenv("FORECAST_MODE", "local") != 'global':
+        return
+    from src.ai.global_model import serving
+    if serving.refresh() is None:
+        print("⚠️ No published global model yet (run python -m src.ai.global_model)")
+
+#forwards NOTIFY events from a harvest running in another process
+progress_listener = ProgressListener(db)
+warm_up_lock = threading.Lock()
+warmed_up = False
+
+#startup work runs once, on the first request the serving process gets, not at import,
+#so importing the app (tests, benchmarks, the reloader's parent) stays cheap and side-effect free
+@app.before_request
+def warm_up():
+    global warmed_up
+    if warmed_up:
+        return
+    with warm_up_lock:
+        if warmed_up:
+            return
+        warmed_up = True
+        progress_listener.start()
+        threading.Thread(target=lambda: (warm_search_index(), warm_forecast_model()),
+                         name="app-warm-up", daemon=True).start()
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
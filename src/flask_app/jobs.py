@@ -0,0 +1,93 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from src.monitoring.metrics import record_cache
+
+
+class JobQueueFull(Exception):
+    """Raised when the forecast executor already holds max_pending jobs."""
+
+
+#runs slow forecast work off the request thread
+#identical in-flight jobs share one job id
+class JobManager:
+    def __init__(self, max_workers=2, max_pending=32, ttl_seconds=600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="forecast-job")
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.jobs = {}       # job_id -> job record
+        self.inflight = {}   # dedup key -> job_id
+        self.lock = threading.Lock()
+
+    #queue a job, or return the id of an identical job that is still running
+    def submit(self, key, fn, *args):
+        with self.lock:
+            self._purge_expired()
+
+            hit = key in self.inflight
+            record_cache('forecast_jobs', hit)
+            if hit:
+                return self.inflight[key], False
+
+            if len(self.inflight) >= self.max_pending:
+                raise JobQueueFull(f"{len(self.inflight)} forecast jobs already pending")
+
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                'id': job_id,
+                'key': key,
+                'status': 'queued',
+                'result': None,
+                'error': None,
+                'created_at': time.time(),
+                'finished_at': None,
+                'done': threading.Event(),
+            }
+            self.inflight[key] = job_id
+
+        self.executor.submit(self._run, job_id, fn, args)
+        return job_id, True
+
+    def _run(self, job_id, fn, args):
+        job = self.jobs[job_id]
+        job['status'] = 'running'
+        try:
+            job['result'] = fn(*args)
+            job['status'] = 'done'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            job['finished_at'] = time.time()
+            with self.lock:
+                self.inflight.pop(job['key'], None)
+            job['done'].set()
+
+    #drop finished jobs nobody collected within the ttl
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [jid for jid, job in self.jobs.items()
+                   if job['finished_at'] and job['finished_at'] < cutoff]
+        for jid in expired:
+            del self.jobs[jid]
+
+    #public view of a job (no event object)
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if not job:
+            return None
+        return {
+            'job_id': job['id'],
+            'status': job['status'],
+            'result': job['result'],
+            'error': job['error'],
+        }
+
+    #block until the job finishes or the timeout passes
+    def wait(self, job_id, timeout=None):
+        job = self.jobs.get(job_id)
+        if not job:
+            return None
+        job['done'].wait(timeout)
+        return self.get(job_id)
@@ -0,0 +1,147 @@
+import bisect
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    #times the with-block into this histogram
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    le = _format_labels(self.label_names, labels, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = _format_labels(self.label_names, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {series[-1]}")
+                base = _format_labels(self.label_names, labels)
+                lines.append(f"{self.name}_sum{base} {series[-2]}")
+                lines.append(f"{self.name}_count{base} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, cls, name, help_text, labels, **kwargs):
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(name, help_text, labels, **kwargs)
+            return self.metrics[name]
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, labels, buckets=buckets)
+
+    #Prometheus text exposition format
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "marketpulse_http_request_duration_seconds", "Flask request latency by route.",
+    ("route", "method", "status"))
+HELPER_LATENCY = REGISTRY.histogram(
+    "marketpulse_helper_duration_seconds", "Dashboard helper latency.", ("helper",))
+HELPER_ERRORS = REGISTRY.counter(
+    "marketpulse_helper_errors_total", "Dashboard helper failures.", ("helper",))
+QUERY_LATENCY = REGISTRY.histogram(
+    "marketpulse_db_query_duration_seconds", "SQL statement latency by statement.", ("query",))
+QUERY_ERRORS = REGISTRY.counter(
+    "marketpulse_db_query_errors_total", "SQL statements that raised.", ("query",))
+CACHE_REQUESTS = REGISTRY.counter(
+    "marketpulse_cache_requests_total", "Cache lookups by cache and result (hit/miss).", ("cache", "result"))
+MODEL_FIT_LATENCY = REGISTRY.histogram(
+    "marketpulse_model_fit_seconds", "Forecast model fit time.", ("model",))
+MODEL_PREDICT_LATENCY = REGISTRY.histogram(
+    "marketpulse_model_predict_seconds", "Forecast model predict time.", ("model",))
+PIPELINE_STAGE_LATENCY = REGISTRY.histogram(
+    "marketpulse_pipeline_stage_seconds", "Harvest pipeline time per item (per batch for write) by stage.", ("stage",))
+FORECAST_TIER = REGISTRY.counter(
+    "marketpulse_forecast_tier_total", "Local forecasts served per estimator tier.", ("tier",))
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+#collapses whitespace and trims so each statement is one short label
+def query_label(sql, limit=80):
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    text = " ".join(str(sql).split())
+    text = re.sub(r"(%s\s*,\s*)+%s", "%s,...", text)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
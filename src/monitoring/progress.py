@@ -0,0 +1,140 @@
+import json
+import os
+import queue
+import select
+import threading
+import time
+
+#Postgres NOTIFY channel shared by the harvester and the dashboard
+CHANNEL = "harvest_progress"
+
+#a run that has not reported anything for this long is shown as stalled
+STALL_SECONDS = int(os.getenv("HARVEST_STALL_SECONDS", "120"))
+
+
+#in-process fan-out of progress events to any number of subscribers
+class ProgressBus:
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self.subscribers = set()
+        self.last_event = None
+        self.lock = threading.Lock()
+
+    def publish(self, event):
+        with self.lock:
+            self.last_event = event
+            subscribers = list(self.subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass  # slow client, drop rather than stall the harvest
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.discard(q)
+
+    #short status string for the dashboard header
+    def status(self):
+        event = self.last_event
+        if not event:
+            return "Idle"
+        if event['type'] == 'run_finished':
+            return "Synced " + time.strftime('%b %d %H:%M', time.localtime(event['ts']))
+        if time.time() - event['ts'] > STALL_SECONDS:
+            return "Stalled"
+        return f"Live · {event.get('vendor') or 'harvest'}"
+
+
+bus = ProgressBus()
+
+
+#used by the harvester: every event goes to the local bus and out over NOTIFY
+class ProgressPublisher:
+    def __init__(self, db=None):
+        self.db = db
+        self.conn = None
+        self.run_id = f"{os.getpid()}-{int(time.time())}"
+        #pipeline stages publish from several threads over one connection
+        self.lock = threading.Lock()
+
+    def _notify(self, event):
+        with self.lock:
+            self._send(event)
+
+    def _send(self, event):
+        try:
+            if self.conn is None or self.conn.closed:
+                self.conn = self.db.get_connection()
+                self.conn.autocommit = True
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT pg_notify(%s, %s)", (CHANNEL, json.dumps(event, default=str)))
+        except Exception as e:
+            print(f"⚠️ Progress notify failed: {e}")
+            self.conn = None
+
+    def publish(self, kind, **fields):
+        event = {'type': kind, 'ts': time.time(), 'run_id': self.run_id, 'pid': os.getpid(), **fields}
+        bus.publish(event)
+        if self.db:
+            self._notify(event)
+        return event
+
+    def close(self):
+        if self.conn and not self.conn.closed:
+            self.conn.close()
+        self.conn = None
+
+
+#used by the dashboard: LISTENs on the channel and forwards events from
+#other processes into the local bus
+class ProgressListener(threading.Thread):
+    def __init__(self, db, poll_seconds=5.0):
+        super().__init__(name="harvest-progress-listener", daemon=True)
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        backoff = 1.0
+        while not self.stopped.is_set():
+            conn = None
+            try:
+                conn = self.db.get_connection()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                backoff = 1.0
+                self._drain(conn)
+            except Exception as e:
+                print(f"⚠️ Progress listener disconnected: {e}")
+                self.stopped.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+            finally:
+                if conn and not conn.closed:
+                    conn.close()
+
+    def _drain(self, conn):
+        own_pid = os.getpid()
+        while not self.stopped.is_set():
+            if select.select([conn], [], [], self.poll_seconds) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    event = json.loads(notify.payload)
+                except ValueError:
+                    continue
+                #same-process events already went straight to the bus
+                if event.get('pid') != own_pid:
+                    bus.publish(event)
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.database.db_manager import DatabaseManager
+from src.monitoring.telemetry import STAGES
+
+#a vendor/stage whose latest p50 exceeds its earlier median p50 by this factor is flagged
+REGRESSION_FACTOR = float(os.getenv("SCRAPE_REGRESSION_FACTOR", "1.5"))
+
+STAGE_COLUMNS = STAGES + ('total',)
+UNPIVOT = ", ".join(f"('{s}', e.{s}_ms)" for s in STAGE_COLUMNS)
+
+
+def latest_runs(cur, limit):
+    cur.execute("""
+        SELECT id, run_key, kind, started_at, finished_at, items, saved, failed
+        FROM scrape_runs
+        ORDER BY id DESC
+        LIMIT %s
+    """, (limit,))
+    return cur.fetchall()
+
+
+#p50/p95 per vendor and stage for the given runs: {(run_id, vendor, stage): (count, p50, p95)}
+def stage_percentiles(cur, run_ids):
+    cur.execute(f"""
+        SELECT e.run_id, e.vendor_name, s.stage, COUNT(*),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY s.ms),
+               percentile_cont(0.95) WITHIN GROUP (ORDER BY s.ms)
+        FROM scrape_events e
+        CROSS JOIN LATERAL (VALUES {UNPIVOT}) AS s(stage, ms)
+        WHERE e.run_id = ANY(%s) AND s.ms IS NOT NULL
+        GROUP BY e.run_id, e.vendor_name, s.stage
+    """, (list(run_ids),))
+    return {(r[0], r[1], r[2]): (r[3], float(r[4]), float(r[5])) for r in cur.fetchall()}
+
+
+#per vendor and run: outcome mix and median page size
+def vendor_outcomes(cur, run_ids):
+    cur.execute("""
+        SELECT run_id, vendor_name, COUNT(*),
+               COUNT(*) FILTER (WHERE outcome = 'saved'),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY bytes)
+        FROM scrape_events
+        WHERE run_id = ANY(%s)
+        GROUP BY run_id, vendor_name
+    """, (list(run_ids),))
+    return {(r[0], r[1]): {'urls': r[2], 'saved': r[3], 'median_bytes': int(r[4]) if r[4] else None}
+            for r in cur.fetchall()}
+
+
+#latest run vs the median of the earlier ones, per vendor and stage
+def find_regressions(percentiles, run_ids):
+    latest, earlier = run_ids[0], run_ids[1:]
+    regressions = []
+    for (run_id, vendor, stage), (_, p50, _) in percentiles.items():
+        if run_id != latest:
+            continue
+        history = sorted(percentiles[(r, vendor, stage)][1] for r in earlier if (r, vendor, stage) in percentiles)
+        if not history:
+            continue
+        baseline = history[len(history) // 2]
+        if baseline > 0 and p50 > baseline * REGRESSION_FACTOR:
+            regressions.append({'vendor': vendor, 'stage': stage, 'p50_ms': round(p50, 1),
+                                'baseline_ms': round(baseline, 1), 'ratio': round(p50 / baseline, 2)})
+    return sorted(regressions, key=lambda r: -r['ratio'])
+
+
+def print_report(runs, percentiles, outcomes, regressions):
+    latest = runs[0]
+    print(f"📋 Run {latest[0]} ({latest[2]}, {latest[1]}) started {latest[3]:%Y-%m-%d %H:%M}"
+          f" | {latest[6] or 0}/{latest[5] or 0} saved, {latest[7] or 0} failed")
+    vendors = sorted({v for (r, v, _) in percentiles if r == latest[0]})
+    header = f"   {'vendor':<16}" + "".join(f"{s:>20}" for s in STAGE_COLUMNS)
+    print(header)
+    print(f"   {'':<16}" + "".join(f"{'p50 / p95 ms':>20}" for _ in STAGE_COLUMNS))
+    for vendor in vendors:
+        cells = []
+        for stage in STAGE_COLUMNS:
+            value = percentiles.get((latest[0], vendor, stage))
+            cells.append(f"{value[1]:,.0f} / {value[2]:,.0f}" if value else "-")
+        print(f"   {vendor:<16}" + "".join(f"{c:>20}" for c in cells))
+
+    print(f"\n📈 Trend over the last {len(runs)} runs (p50 total ms, saved/urls, median KB)")
+    all_vendors = sorted({v for (_, v, _) in percentiles})
+    print(f"   {'run':<8}{'started':<18}" + "".join(f"{v[:18]:>26}" for v in all_vendors))
+    for run in runs:
+        cells = []
+        for vendor in all_vendors:
+            total = percentiles.get((run[0], vendor, 'total'))
+            stats = outcomes.get((run[0], vendor))
+            if not total or not stats:
+                cells.append("-")
+                continue
+            size = f"{stats['median_bytes'] / 1024:.0f}KB" if stats['median_bytes'] else "-"
+            cells.append(f"{total[1]:,.0f} {stats['saved']}/{stats['urls']} {size}")
+        print(f"   {run[0]:<8}{run[3]:%m-%d %H:%M}{'':<7}" + "".join(f"{c:>26}" for c in cells))
+
+    if regressions:
+        print(f"\n⚠️ Regressions (p50 > {REGRESSION_FACTOR}x earlier median)")
+        for r in regressions:
+            print(f"   {r['vendor']} / {r['stage']}: {r['p50_ms']:,} ms vs {r['baseline_ms']:,} ms ({r['ratio']}x)")
+    elif len(runs) > 1:
+        print("\n✅ No stage regressed against earlier runs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-vendor, per-stage scrape timings and trends across runs")
+    parser.add_argument("--runs", type=int, default=10, help="how many recent runs to compare")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    conn = DatabaseManager().get_connection()
+    try:
+        with conn.cursor() as cur:
+            runs = latest_runs(cur, args.runs)
+            if not runs:
+                print("⚠️ No scrape runs recorded yet")
+                sys.exit(0)
+            run_ids = [r[0] for r in runs]
+            percentiles = stage_percentiles(cur, run_ids)
+            outcomes = vendor_outcomes(cur, run_ids)
+    finally:
+        conn.close()
+
+    regressions = find_regressions(percentiles, run_ids)
+    print_report(runs, percentiles, outcomes, regressions)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                'runs': [{'id': r[0], 'run_key': r[1], 'kind': r[2], 'started_at': str(r[3]),
+                          'items': r[5], 'saved': r[6], 'failed': r[7]} for r in runs],
+                'stages': [{'run_id': k[0], 'vendor': k[1], 'stage': k[2], 'count': v[0],
+                            'p50_ms': round(v[1], 1), 'p95_ms': round(v[2], 1)} for k, v in percentiles.items()],
+                'regressions': regressions,
+            }, f, indent=2)
@@ -0,0 +1,92 @@
+import threading
+
+from psycopg2.extras import execute_values
+
+#per-item timings recorded for every scraped URL, in pipeline order
+STAGES = ('queue_wait', 'polite_delay', 'retry_wait', 'fetch', 'render_wait', 'parse', 'db_write')
+
+
+#writes one scrape_runs row per harvest and one scrape_events row per URL
+#events are buffered and inserted in batches on the recorder's own connection;
+#a telemetry failure is reported once and never stops the harvest
+class RunRecorder:
+    def __init__(self, db, run_key, kind, flush_every=100):
+        self.db = db
+        self.run_key = run_key
+        self.kind = kind
+        self.flush_every = flush_every
+        self.conn = None
+        self.run_id = None
+        self.buffer = []
+        self.lock = threading.Lock()
+
+    def _disable(self, e):
+        print(f"⚠️ Scrape telemetry disabled: {e}")
+        if self.conn and not self.conn.closed:
+            self.conn.close()
+        self.conn = None
+
+    def start(self):
+        try:
+            self.conn = self.db.get_connection()
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO scrape_runs (run_key, kind, started_at)
+                    VALUES (%s, %s, NOW())
+                    RETURNING id
+                """, (self.run_key, self.kind))
+                self.run_id = cur.fetchone()[0]
+            self.conn.commit()
+        except Exception as e:
+            self._disable(e)
+        return self
+
+    #timings in seconds keyed by STAGES; missing stages are stored as NULL
+    def record(self, vendor, url, outcome, timings, total_seconds, size_bytes=None):
+        if self.conn is None:
+            return
+        row = (self.run_id, vendor, url, outcome, size_bytes,
+               *[round(timings[s] * 1000, 1) if s in timings else None for s in STAGES],
+               round(total_seconds * 1000, 1))
+        with self.lock:
+            self.buffer.append(row)
+            if len(self.buffer) >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        rows, self.buffer = self.buffer, []
+        if not rows or self.conn is None:
+            return
+        try:
+            with self.conn.cursor() as cur:
+                execute_values(cur, f"""
+                    INSERT INTO scrape_events (run_id, vendor_name, url, outcome, bytes,
+                        {', '.join(f'{s}_ms' for s in STAGES)}, total_ms)
+                    VALUES %s
+                """, rows)
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            self._disable(e)
+
+    #'skipped' items (circuit open, already recorded) count towards items but not failed
+    def finish(self, outcomes):
+        with self.lock:
+            self._flush()
+            if self.conn is None:
+                return
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute("""
+                        UPDATE scrape_runs
+                        SET finished_at = NOW(), items = %s, saved = %s, failed = %s
+                        WHERE id = %s
+                    """, (sum(outcomes.values()), outcomes.get('saved', 0),
+                          outcomes.get('failed', 0) + outcomes.get('error', 0), self.run_id))
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                print(f"⚠️ Could not close scrape run {self.run_id}: {e}")
+            finally:
+                self.conn.close()
+                self.conn = None
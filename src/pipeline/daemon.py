@@ -0,0 +1,232 @@
+import os
+import signal
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only guard jobs inside one process
+    fcntl = None
+
+LOCK_DIR = os.getenv("DAEMON_LOCK_DIR", os.path.join("data", "locks"))
+#on SIGTERM/SIGINT running jobs get this long to finish before the daemon exits anyway
+SHUTDOWN_TIMEOUT = float(os.getenv("DAEMON_SHUTDOWN_TIMEOUT", "900"))
+#upper bound on one sleep, so a changed system clock is noticed
+MAX_SLEEP_SECONDS = 60
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+
+#five-field cron expression: minute hour day-of-month month day-of-week
+#each field takes *, */n, a-b, a-b/n, n and comma lists of those; Sunday is 0 (or 7)
+class CronSchedule:
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expr):
+        self.expr = expr
+        fields = ALIASES.get(expr.strip(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+        parsed = [self._parse_field(text, lo, hi) for text, (lo, hi) in zip(fields, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}
+        #cron rule: when both day fields are restricted a day matches either of them
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(text, lo, hi):
+        values = set()
+        for part in text.split(","):
+            span, _, step = part.partition("/")
+            step = int(step) if step else 1
+            if span == "*":
+                start, end = lo, hi
+            elif "-" in span:
+                start, end = (int(v) for v in span.split("-"))
+            else:
+                start = int(span)
+                end = hi if step > 1 else start
+            if not (lo <= start <= end <= hi) or step < 1:
+                raise ValueError(f"Cron field {text!r} is outside {lo}-{hi}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt):
+        in_days = dt.day in self.days
+        in_weekdays = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    #first matching minute strictly after dt
+    def next_after(self, dt):
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression never fires: {self.expr!r}")
+
+
+#named lock held while a job runs, shared with every other process on the machine
+#(flock on data/locks/<name>.lock), so a manual `python main.py` and the daemon's
+#harvest never overlap; the kernel drops the lock if the holder dies
+class RunLock:
+    _local = {}
+    _local_guard = threading.Lock()
+
+    def __init__(self, name, root=LOCK_DIR):
+        self.name = name
+        self.path = os.path.join(root, f"{name}.lock")
+        self.file = None
+
+    def acquire(self):
+        if fcntl is None:
+            with self._local_guard:
+                lock = self._local.setdefault(self.name, threading.Lock())
+            return lock.acquire(blocking=False)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, "a+")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()} {datetime.now().isoformat(timespec='seconds')}\n")
+        f.flush()
+        self.file = f
+        return True
+
+    def release(self):
+        if fcntl is None:
+            self._local[self.name].release()
+        elif self.file:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+    #"pid started_at" of the current holder, for log messages
+    def holder(self):
+        try:
+            with open(self.path) as f:
+                return f.read().strip() or "unknown"
+        except OSError:
+            return "unknown"
+
+    def __enter__(self):
+        if not self.acquire():
+            raise RuntimeError(f"{self.name} is already running (held by {self.holder()})")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+#group: jobs sharing a group never run at the same time (e.g. harvest and matching both rewrite mappings)
+class Job:
+    def __init__(self, name, schedule, fn, group=None, run_on_start=False):
+        self.name = name
+        self.schedule = schedule if isinstance(schedule, CronSchedule) else CronSchedule(schedule)
+        self.fn = fn
+        self.group = group or name
+        self.run_on_start = run_on_start
+        self.next_run = None
+        self.last_run = None
+        self.last_outcome = None
+
+
+#runs jobs on their cron schedules in one long-lived process
+#each job runs in its own thread under its group's RunLock; a job whose group is
+#still busy when it comes due is skipped until its next slot rather than queued
+#SIGTERM/SIGINT stop scheduling, let running jobs finish, then call on_shutdown
+#the caller holds RunLock("daemon") around setup and run() so only one daemon runs
+class Daemon:
+    def __init__(self, jobs, on_shutdown=None, shutdown_timeout=SHUTDOWN_TIMEOUT):
+        self.jobs = jobs
+        self.on_shutdown = on_shutdown
+        self.shutdown_timeout = shutdown_timeout
+        self.stop = threading.Event()
+        self.threads = {}
+
+    def _handle_signal(self, signum, frame):
+        if self.stop.is_set():
+            print("⚠️ Second signal, exiting without waiting for jobs")
+            os._exit(1)
+        print(f"🛑 {signal.Signals(signum).name} received, finishing running jobs...")
+        self.stop.set()
+
+    def launch(self, job):
+        lock = RunLock(job.group)
+        if not lock.acquire():
+            job.last_outcome = 'skipped'
+            print(f"⏭️ {job.name}: {job.group} still running (held by {lock.holder()}), skipping this slot")
+            return False
+        thread = threading.Thread(target=self._run_job, args=(job, lock), name=f"job-{job.name}", daemon=True)
+        self.threads[job.name] = thread
+        thread.start()
+        return True
+
+    def _run_job(self, job, lock):
+        start = time.time()
+        job.last_run = datetime.now()
+        print(f"▶️ {job.name} started")
+        try:
+            job.fn()
+            job.last_outcome = 'ok'
+            print(f"✅ {job.name} finished in {time.time() - start:.0f}s")
+        except Exception:
+            job.last_outcome = 'failed'
+            print(f"❌ {job.name} failed after {time.time() - start:.0f}s")
+            traceback.print_exc()
+        finally:
+            lock.release()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        now = datetime.now()
+        for job in self.jobs:
+            job.next_run = now if job.run_on_start else job.schedule.next_after(now)
+            print(f"🗓️ {job.name} [{job.schedule.expr}] next at {job.next_run:%Y-%m-%d %H:%M}")
+
+        while not self.stop.is_set():
+            now = datetime.now()
+            for job in self.jobs:
+                if job.next_run <= now:
+                    self.launch(job)
+                    job.next_run = job.schedule.next_after(now)
+            wake = min(job.next_run for job in self.jobs)
+            self.stop.wait(min(MAX_SLEEP_SECONDS, max(0.0, (wake - datetime.now()).total_seconds())))
+
+        self._drain()
+
+    def _drain(self):
+        deadline = time.time() + self.shutdown_timeout
+        for name, thread in self.threads.items():
+            if thread.is_alive():
+                print(f"⏳ Waiting for {name}...")
+                thread.join(max(0.0, deadline - time.time()))
+                if thread.is_alive():
+                    print(f"⚠️ {name} still running after {self.shutdown_timeout:.0f}s, exiting anyway")
+        if self.on_shutdown:
+            self.on_shutdown()
+        print("👋 Daemon stopped")
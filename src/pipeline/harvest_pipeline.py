@@ -0,0 +1,280 @@
+import os
+import queue
+import threading
+import time
+
+from src.monitoring.metrics import PIPELINE_STAGE_LATENCY
+from src.scrapers.resilience import CircuitOpen
+
+PARSE_WORKERS = int(os.getenv("PIPELINE_PARSE_WORKERS", "2"))
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "50"))
+WRITE_BATCH_SIZE = int(os.getenv("PIPELINE_WRITE_BATCH", "25"))
+WRITE_FLUSH_SECONDS = float(os.getenv("PIPELINE_FLUSH_SECONDS", "2.0"))
+REPORT_SECONDS = float(os.getenv("PIPELINE_REPORT_SECONDS", "30"))
+#URLs skipped by an open circuit are retried once at the end if the vendor's
+#next probe is due within this many seconds; otherwise they are dropped
+MAX_DEFER_SECONDS = float(os.getenv("PIPELINE_MAX_DEFER_SECONDS", "300"))
+
+_DONE = object()
+
+
+#throughput and utilisation of one stage; `inbox` is the queue feeding it
+class StageStats:
+    def __init__(self, name, workers, inbox=None):
+        self.name = name
+        self.workers = workers
+        self.inbox = inbox
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0  # waiting on a full downstream queue (backpressure)
+        self.lock = threading.Lock()
+
+    def record(self, seconds, count=1):
+        PIPELINE_STAGE_LATENCY.observe(seconds, self.name)
+        with self.lock:
+            self.items += count
+            self.busy += seconds
+
+    def record_blocked(self, seconds):
+        with self.lock:
+            self.blocked += seconds
+
+    def snapshot(self, elapsed):
+        capacity = max(elapsed * self.workers, 1e-9)
+        with self.lock:
+            return {
+                'stage': self.name,
+                'workers': self.workers,
+                'queue': self.inbox.qsize() if self.inbox else 0,
+                'items': self.items,
+                'per_min': round(self.items / max(elapsed, 1e-9) * 60, 1),
+                'busy_pct': round(self.busy / capacity * 100, 1),
+                'blocked_pct': round(self.blocked / capacity * 100, 1),
+            }
+
+
+#fetch -> parse -> write over bounded queues
+#fetch: one thread per vendor scraper (a browser is not shared between threads)
+#parse: a small pool running the scrapers' BeautifulSoup parse_product
+#write: one thread saving batches through DatabaseManager.save_scraped_batch
+#a full queue blocks the stage before it, so a slow database throttles fetching
+class HarvestPipeline:
+    #recorder: optional telemetry.RunRecorder that persists per-URL step timings
+    #snapshots: optional SnapshotStore that archives every fetched page with its parse result
+    #keep_drivers: leave the scrapers' browsers open after the run (the daemon reuses them)
+    def __init__(self, db, progress, parse_workers=PARSE_WORKERS, queue_size=QUEUE_SIZE,
+                 batch_size=WRITE_BATCH_SIZE, flush_seconds=WRITE_FLUSH_SECONDS, report_seconds=REPORT_SECONDS,
+                 recorder=None, snapshots=None, keep_drivers=False):
+        self.db = db
+        self.keep_drivers = keep_drivers
+        self.progress = progress
+        self.recorder = recorder
+        self.snapshots = snapshots
+        self.parse_workers = parse_workers
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.report_seconds = report_seconds
+        self.parse_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+        self.stats = {}
+        self.outcomes = {}
+        self.outcome_lock = threading.Lock()
+        self.started = None
+        self.stopped = threading.Event()
+
+    def _put(self, q, item, stage):
+        item['queued_at'] = start = time.perf_counter()
+        q.put(item)
+        self.stats[stage].record_blocked(time.perf_counter() - start)
+
+    #time from being handed to a queue (including backpressure) until a worker took it
+    @staticmethod
+    def _dequeued(item):
+        waited = time.perf_counter() - item.pop('queued_at')
+        item['timings']['queue_wait'] = item['timings'].get('queue_wait', 0.0) + waited
+
+    def _finish(self, item, outcome):
+        total = time.perf_counter() - item['started']
+        with self.outcome_lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.progress.publish('product', vendor=item['vendor'], url=item['url'], index=item['index'],
+                              total=item['total'], outcome=outcome, latency_ms=round(total * 1000))
+        if self.recorder:
+            self.recorder.record(item['vendor'], item['url'], outcome, item['timings'], total, item.get('bytes'))
+
+    #fetches one URL; returns False when the vendor's circuit is open
+    def _fetch_one(self, scraper, url, index, total):
+        item = {'vendor': scraper.vendor_name, 'scraper': scraper, 'url': url,
+                'index': index, 'total': total, 'started': time.perf_counter()}
+        scraper.timings = {}
+        try:
+            item['html'] = scraper.fetch_product(url)
+        except CircuitOpen:
+            return False
+        except Exception as e:
+            print(f"      ❌ Error: {e}")
+            item['html'] = None
+        elapsed = time.perf_counter() - item['started']
+        self.stats['fetch'].record(elapsed)
+
+        #whatever the scraper did not attribute to a step counts as fetch
+        item['timings'] = dict(scraper.timings)
+        item['timings'].setdefault('fetch', max(0.0, elapsed - sum(item['timings'].values())))
+        if item['html'] is not None:
+            item['bytes'] = len(item['html'].encode('utf-8'))
+
+        if item['html'] is None:
+            self._finish(item, 'error')
+        else:
+            self._put(self.parse_queue, item, 'fetch')
+        return True
+
+    def _skip(self, scraper, url, index, total):
+        self._finish({'vendor': scraper.vendor_name, 'url': url, 'index': index, 'total': total,
+                      'started': time.perf_counter(), 'timings': {}}, 'skipped')
+
+    def _fetch_worker(self, scraper, urls):
+        deferred = []
+        try:
+            for url, index, total in urls:
+                if not self._fetch_one(scraper, url, index, total):
+                    deferred.append((url, index, total))
+
+            #give a tripped vendor one more chance once its breaker is ready to probe
+            if deferred:
+                wait = scraper.breaker.retry_in()
+                if wait > MAX_DEFER_SECONDS:
+                    print(f"⏭️ {scraper.vendor_name}: dropping {len(deferred)} deferred URLs (circuit open)")
+                else:
+                    print(f"⏳ {scraper.vendor_name}: retrying {len(deferred)} deferred URLs in {wait:.0f}s")
+                    time.sleep(wait)
+                    deferred = [job for job in deferred if not self._fetch_one(scraper, *job)]
+            for job in deferred:
+                self._skip(scraper, *job)
+        finally:
+            if hasattr(scraper, 'close_driver') and not self.keep_drivers:
+                scraper.close_driver()
+
+    def _parse_worker(self):
+        while True:
+            item = self.parse_queue.get()
+            if item is _DONE:
+                break
+            self._dequeued(item)
+            start = time.perf_counter()
+            html = item.pop('html')
+            try:
+                item['data'] = item['scraper'].parse_product(html, item['url'])
+            except Exception as e:
+                print(f"      ❌ Parse error for {item['url']}: {e}")
+                item['data'] = None
+            item['timings']['parse'] = time.perf_counter() - start
+            self.stats['parse'].record(item['timings']['parse'])
+            if self.snapshots:
+                try:
+                    self.snapshots.put(item['scraper'], item['url'], html, item['data'])
+                except OSError as e:
+                    print(f"⚠️ Snapshot not saved for {item['url']}: {e}")
+
+            if not item['data']:
+                print(f"      ❌ Failed to extract data: {item['url']}")
+                self._finish(item, 'failed')
+                continue
+            self._put(self.write_queue, item, 'parse')
+
+    def _flush(self, batch):
+        #waiting for the batch to fill counts as queue time too
+        for item in batch:
+            self._dequeued(item)
+        start = time.perf_counter()
+        try:
+            outcomes = self.db.save_scraped_batch([item['data'] for item in batch])
+        except Exception as e:
+            #the writer must keep draining, or parsers and fetchers block on the full queues
+            print(f"❌ Write batch of {len(batch)} failed: {e}")
+            self._rollback()
+            outcomes = ['failed'] * len(batch)
+        elapsed = time.perf_counter() - start
+        self.stats['write'].record(elapsed, len(batch))
+        for item, outcome in zip(batch, outcomes):
+            #each item carries an equal share of its batch's commit
+            item['timings']['db_write'] = elapsed / len(batch)
+            self._finish(item, outcome)
+
+    def _rollback(self):
+        conn = getattr(self.db, 'conn', None)
+        if conn is None or conn.closed:
+            return
+        try:
+            conn.rollback()
+        except Exception:
+            #connection is gone; connect() opens a fresh one for the next batch
+            conn.close()
+
+    def _write_worker(self):
+        batch, deadline = [], None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.write_queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _DONE:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+            if batch and (item is None or item is _DONE or len(batch) >= self.batch_size):
+                self._flush(batch)
+                batch, deadline = [], None
+            if item is _DONE:
+                break
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        return [stats.snapshot(elapsed) for stats in self.stats.values()]
+
+    def _print_report(self, stages):
+        print("   📊 " + " | ".join(f"{s['stage']}: {s['per_min']}/min, q={s['queue']}, busy {s['busy_pct']}%"
+                                   f"{', blocked ' + str(s['blocked_pct']) + '%' if s['blocked_pct'] else ''}"
+                                   for s in stages))
+
+    def _reporter(self):
+        while not self.stopped.wait(self.report_seconds):
+            stages = self.report()
+            self._print_report(stages)
+            self.progress.publish('pipeline_stats', stages=stages)
+
+    #sources: {vendor: (scraper, iterable of (product_url, index, total))}
+    #the iterable may discover urls lazily (category scans run on the fetch thread)
+    def run(self, sources):
+        self.stats = {
+            'fetch': StageStats('fetch', len(sources)),
+            'parse': StageStats('parse', self.parse_workers, self.parse_queue),
+            'write': StageStats('write', 1, self.write_queue),
+        }
+        self.started = time.perf_counter()
+
+        fetchers = [threading.Thread(target=self._fetch_worker, args=(scraper, urls), name=f"fetch-{vendor}")
+                    for vendor, (scraper, urls) in sources.items()]
+        parsers = [threading.Thread(target=self._parse_worker, name=f"parse-{i}") for i in range(self.parse_workers)]
+        writer = threading.Thread(target=self._write_worker, name="write")
+        reporter = threading.Thread(target=self._reporter, name="pipeline-report", daemon=True)
+        for thread in fetchers + parsers + [writer, reporter]:
+            thread.start()
+
+        #drain in stage order so nothing is left in a queue
+        for thread in fetchers:
+            thread.join()
+        for _ in parsers:
+            self.parse_queue.put(_DONE)
+        for thread in parsers:
+            thread.join()
+        self.write_queue.put(_DONE)
+        writer.join()
+        self.stopped.set()
+
+        stages = self.report()
+        self._print_report(stages)
+        self.progress.publish('pipeline_stats', stages=stages, final=True)
+        return {'stages': stages, 'outcomes': dict(self.outcomes)}
@@ -0,0 +1,112 @@
+import os
+
+#pages each vendor may load per run; SCRAPE_BUDGETS="Nanotek=80,Barclays=150" overrides per vendor
+DEFAULT_BUDGET = int(os.getenv("SCRAPE_PAGE_BUDGET", "100"))
+#a perfectly stable listing is refreshed every MAX_INTERVAL_HOURS, a very volatile one every MIN
+MIN_INTERVAL_HOURS = float(os.getenv("SCRAPE_MIN_INTERVAL_HOURS", "12"))
+MAX_INTERVAL_HOURS = float(os.getenv("SCRAPE_MAX_INTERVAL_HOURS", "168"))
+#how much price changes and stock flips shorten the interval
+VOLATILITY_WEIGHT = 20.0
+FLAP_WEIGHT = 0.5
+LOOKBACK_DAYS = 90
+#never-scraped URLs may take at most this share of a vendor's budget while due URLs wait
+FRESH_SHARE = float(os.getenv("SCRAPE_FRESH_SHARE", "0.5"))
+
+
+def parse_budgets(text):
+    budgets = {}
+    for part in filter(None, (p.strip() for p in (text or "").split(","))):
+        vendor, _, pages = part.rpartition("=")
+        budgets[vendor.strip()] = int(pages)
+    return budgets
+
+
+#chooses which discovered product URLs to refresh this run
+#each URL gets a refresh interval from how often its price changed and its
+#stock flipped (per scrape, last LOOKBACK_DAYS); URLs past their interval are
+#due and the most overdue ones are taken until the vendor's page budget is spent.
+#URLs never seen before go first, up to FRESH_SHARE of the budget; URLs that were
+#fetched (scrape_events) but never produced a price are retried like the most
+#stable listing, so pages that always fail cannot eat the budget every run
+class RefreshScheduler:
+    def __init__(self, db, default_budget=DEFAULT_BUDGET, budgets=None):
+        self.db = db
+        self.default_budget = default_budget
+        self.budgets = budgets if budgets is not None else parse_budgets(os.getenv("SCRAPE_BUDGETS"))
+        self.stats = None
+        self.attempts = {}
+
+    def budget(self, vendor):
+        return self.budgets.get(vendor, self.default_budget)
+
+    #{url: (scrapes, change_rate, flap_rate, hours_since_last_scrape)} in one pass over market_data
+    #rates are per scrape, so interval rows (PRICE_STORAGE=intervals) count every observation
+    #ages are computed by the database, whose NOW() stamped the rows
+    def load_stats(self):
+        conn = self.db.get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT product_url, SUM(observations),
+                           SUM(CASE WHEN price <> prev_price THEN 1.0 ELSE 0.0 END) / NULLIF(SUM(observations) - 1, 0),
+                           SUM(CASE WHEN is_in_stock <> prev_stock THEN 1.0 ELSE 0.0 END) / NULLIF(SUM(observations) - 1, 0),
+                           EXTRACT(EPOCH FROM NOW() - MAX(COALESCE(valid_to, scraped_at))) / 3600
+                    FROM (
+                        SELECT product_url, price, is_in_stock, scraped_at, valid_to, observations,
+                               LAG(price) OVER w AS prev_price,
+                               LAG(is_in_stock) OVER w AS prev_stock
+                        FROM market_data
+                        WHERE COALESCE(valid_to, scraped_at) > NOW() - make_interval(days => %s) AND product_url IS NOT NULL
+                        WINDOW w AS (PARTITION BY product_url ORDER BY scraped_at)
+                    ) history
+                    GROUP BY product_url
+                """, (LOOKBACK_DAYS,))
+                self.stats = {row[0]: (row[1], float(row[2] or 0), float(row[3] or 0), float(row[4]))
+                              for row in cur.fetchall()}
+
+                #hours since each URL was last fetched, whatever the outcome; older attempts don't matter
+                cur.execute("""
+                    SELECT url, EXTRACT(EPOCH FROM NOW() - MAX(created_at)) / 3600
+                    FROM scrape_events
+                    WHERE created_at > NOW() - make_interval(hours => %s) AND outcome <> 'skipped'
+                    GROUP BY url
+                """, (int(MAX_INTERVAL_HOURS),))
+                self.attempts = {row[0]: float(row[1]) for row in cur.fetchall()}
+        finally:
+            conn.close()
+        return self.stats
+
+    @staticmethod
+    def interval_hours(change_rate, flap_rate):
+        volatility = change_rate + FLAP_WEIGHT * flap_rate
+        hours = MAX_INTERVAL_HOURS / (1 + VOLATILITY_WEIGHT * volatility)
+        return min(MAX_INTERVAL_HOURS, max(MIN_INTERVAL_HOURS, hours))
+
+    #how far past its interval a URL is (>= 1 means due); None for never-attempted URLs
+    def due_ratio(self, url):
+        entry = self.stats.get(url)
+        if entry is None:
+            hours = self.attempts.get(url)
+            return None if hours is None else hours / MAX_INTERVAL_HOURS
+        _, change_rate, flap_rate, hours_since = entry
+        return hours_since / self.interval_hours(change_rate, flap_rate)
+
+    #returns the URLs to scrape for one vendor, highest priority first, and how many were deferred
+    def plan(self, vendor, urls):
+        if self.stats is None:
+            self.load_stats()
+        fresh, due = [], []
+        for url in dict.fromkeys(urls):
+            ratio = self.due_ratio(url)
+            if ratio is None:
+                fresh.append(url)
+            elif ratio >= 1.0:
+                due.append((ratio, url))
+        due.sort(reverse=True)
+
+        budget = self.budget(vendor)
+        fresh_cap = max(1, int(budget * FRESH_SHARE))
+        selected = fresh[:fresh_cap] + [url for _, url in due]
+        #budget left over after the due URLs goes back to the remaining new ones
+        selected = (selected + fresh[fresh_cap:])[:budget]
+        return selected, len(set(urls)) - len(selected)
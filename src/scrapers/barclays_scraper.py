@@ -1,4 +1,5 @@
 from src.scrapers.base_scraper import BaseScraper
+from bs4 import BeautifulSoup
 import re
 import logging
 
@@ -43,11 +44,12 @@ class BarclaysScraper(BaseScraper):
             logging.error(f"❌ Error scanning category: {e}")
             return []    
 
-    def scrape_product(self, product_url: str) -> dict | None:
-        # fetch_page auto implement ethical delay
-        soup = self.fetch_page(product_url)
-        if not soup:
-            return None
+    def fetch_product(self, product_url: str) -> str | None:
+        # fetch_html auto implement ethical delay
+        return self.fetch_html(product_url)
+
+    def parse_product(self, html: str, product_url: str) -> dict | None:
+        soup = BeautifulSoup(html, 'html.parser')
 
         try:
             #Get Name
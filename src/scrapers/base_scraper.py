@@ -4,10 +4,9 @@ import random
 import logging
 from bs4 import BeautifulSoup
 from abc import ABC, abstractmethod
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from contextlib import contextmanager
+from src.scrapers.resilience import (FETCH_RETRIES, RETRYABLE, BROWSER, PERMANENT,
+                                     FetchError, CircuitOpen, classify_error, backoff_seconds, breaker_for)
 
 #log setup to file
 logging.basicConfig(
@@ -21,6 +20,9 @@ class BaseScraper(ABC):
         self.base_url = base_url
         self.vendor_name = vendor_name
         self.driver = None 
+        #seconds spent per step of the current fetch (polite_delay, fetch, render_wait)
+        self.timings = {}
+        self.breaker = breaker_for(vendor_name)
         
         #Identifies as a student project but looks like a normal browser
         self.headers = {
@@ -31,6 +33,8 @@ class BaseScraper(ABC):
         }
 
     def _get_chrome_options(self):
+        #Selenium is only imported by scrapers that render pages
+        from selenium.webdriver.chrome.options import Options
         options = Options()
         options.add_argument("--headless")
         options.add_argument("--window-size=1920,1080")
@@ -45,6 +49,9 @@ class BaseScraper(ABC):
     def setup_driver(self):
         """Initializes the browser ONCE to be reused."""
         if not self.driver:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.service import Service
+            from webdriver_manager.chrome import ChromeDriverManager
             service = Service(ChromeDriverManager().install())
             self.driver = webdriver.Chrome(service=service, options=self._get_chrome_options())
 
@@ -54,26 +61,97 @@ class BaseScraper(ABC):
             self.driver.quit()
             self.driver = None
 
+    @contextmanager
+    def timed(self, step):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[step] = self.timings.get(step, 0.0) + time.perf_counter() - start
+
     def _polite_delay(self):
         """Random delay (2-5s) to act like a human user."""
-        time.sleep(random.uniform(2.0, 5.0))
+        with self.timed('polite_delay'):
+            time.sleep(random.uniform(2.0, 5.0))
 
-    # Downloads the content of a page (for BeautifulSoup scrapers)
-    def fetch_page(self, url):
+    #runs load(url) under the vendor's circuit breaker with classified retries
+    #raises CircuitOpen without touching the site while the vendor is failing,
+    #FetchError once retries are used up (or at once for permanent errors)
+    def guarded(self, url, load):
+        if not self.breaker.allow():
+            raise CircuitOpen(self.vendor_name, self.breaker.retry_in())
         self._polite_delay()
-        try:
+
+        for attempt in range(FETCH_RETRIES + 1):
+            try:
+                result = load(url)
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                kind = classify_error(e)
+                if kind == PERMANENT:
+                    #the site answered, so this says nothing about the vendor's health
+                    self.breaker.record_success()
+                    raise FetchError(kind, f"{url}: {e}") from e
+                if kind == BROWSER:
+                    self.close_driver()
+                if kind not in RETRYABLE or attempt == FETCH_RETRIES:
+                    self.breaker.record_failure()
+                    raise FetchError(kind, f"{url}: {e}") from e
+                delay = backoff_seconds(attempt, kind)
+                print(f"   ↻ {kind} error on {url}, retry {attempt + 1}/{FETCH_RETRIES} in {delay:.1f}s")
+                with self.timed('retry_wait'):
+                    time.sleep(delay)
+
+    def _http_get(self, url):
+        with self.timed('fetch'):
             response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
-        except Exception as e:
-            error_msg = f"❌ Error fetching {url}: {e}"
+        response.raise_for_status()
+        return response.text
+
+    # Downloads the raw HTML of a page
+    # raises CircuitOpen while the vendor is down, None on other failures
+    def fetch_html(self, url):
+        try:
+            return self.guarded(url, self._http_get)
+        except CircuitOpen:
+            raise
+        except FetchError as e:
+            error_msg = f"❌ Error fetching {e}"
             print(error_msg)
             logging.error(error_msg)
             return None
 
-    # Base logic implemented by each scraper
-    @abstractmethod
+    # Downloads the content of a page (for BeautifulSoup scrapers)
+    def fetch_page(self, url):
+        try:
+            html = self.fetch_html(url)
+        except CircuitOpen as e:
+            print(f"⏭️ Skipping {url}: {e}")
+            return None
+        return BeautifulSoup(html, 'html.parser') if html is not None else None
+
+    #fetch (network/browser, one at a time per instance) and parse (pure
+    #BeautifulSoup, safe on any thread) are separate so a pipeline can run them
+    #in different stages; scrape_product chains them for one-off use
     def scrape_product(self, product_url: str) -> dict | None:
+        try:
+            html = self.fetch_product(product_url)
+        except CircuitOpen as e:
+            print(f"⏭️ Skipping {product_url}: {e}")
+            return None
+        if html is None:
+            return None
+        return self.parse_product(html, product_url)
+
+    @abstractmethod
+    def fetch_product(self, product_url: str) -> str | None:
+        """Loads a product page and returns its HTML (None on failure, CircuitOpen while the vendor is down)."""
+        pass
+
+    @abstractmethod
+    def parse_product(self, html: str, product_url: str) -> dict | None:
+        """Extracts name, price and stock status from a product page's HTML."""
         pass
 
     @abstractmethod
@@ -1,8 +1,10 @@
 from src.scrapers.base_scraper import BaseScraper
+from src.scrapers.resilience import FetchError, CircuitOpen
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import re
+from bs4 import BeautifulSoup
 import time
 
 class MSKScraper(BaseScraper):
@@ -61,36 +63,50 @@ class MSKScraper(BaseScraper):
             return []    
 
 
-    def scrape_product(self, product_url: str) -> dict | None:
+    def _render(self, product_url):
         self.setup_driver()
-        
-        if not self.driver:
-            return None
-        
-        try:
-            #Ethical Delay
-            self._polite_delay()
 
-            #Use self.driver
+        #Use self.driver
+        with self.timed('fetch'):
             self.driver.get(product_url)
-            wait = WebDriverWait(self.driver, 15)
-            
+        wait = WebDriverWait(self.driver, 15)
+        
+        with self.timed('render_wait'):
             time.sleep(4) 
 
-            #Extract Name
+            #wait for the title so the price block has rendered too
             try:
-                name_elem = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "main h1")))
-                name = name_elem.text.strip()
-            except:
-                name = "Unknown Product"
+                wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "main h1")))
+            except Exception as e:
+                if type(e).__name__ != 'TimeoutException':
+                    raise
+        return self.driver.page_source
+
+    def fetch_product(self, product_url: str) -> str | None:
+        #Ethical Delay and retries are handled by guarded()
+        try:
+            return self.guarded(product_url, self._render)
+        except CircuitOpen:
+            raise
+        except FetchError as e:
+            print(f"❌ MSK Error: {e}")
+            return None
+
+    def parse_product(self, html: str, product_url: str) -> dict | None:
+        soup = BeautifulSoup(html, 'html.parser')
+
+        try:
+            #Extract Name
+            name_elem = soup.select_one("main h1")
+            name = name_elem.get_text(strip=True) if name_elem else "Unknown Product"
 
             #Extract Price
             price = None
-            price_elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'LKR')]")
+            price_elements = soup.find_all(lambda tag: any('LKR' in t for t in tag.find_all(string=True, recursive=False)))
             
             for elem in price_elements:
-                text = elem.get_attribute("textContent") or ""
-                classes = elem.get_attribute("class") or ""
+                text = elem.get_text() or ""
+                classes = " ".join(elem.get("class", []))
                 
                 if "SAVE" in text.upper() or "line-through" in classes:
                     continue
@@ -107,16 +123,11 @@ class MSKScraper(BaseScraper):
 
             #Extract Stock Status
             is_in_stock = False
-            try:
-                stock_indicator = self.driver.find_element(By.CSS_SELECTOR, "span.text-green-400")
-                if "IN STOCK" in stock_indicator.text.upper():
-                    is_in_stock = True
-            except:
-                try:
-                    stock_div = self.driver.find_element(By.XPATH, "//*[contains(text(), 'In Stock')]")
-                    if stock_div: is_in_stock = True
-                except:
-                    pass
+            stock_indicator = soup.select_one("span.text-green-400")
+            if stock_indicator:
+                is_in_stock = "IN STOCK" in stock_indicator.get_text().upper()
+            elif soup.find(string=lambda t: t and 'In Stock' in t):
+                is_in_stock = True
 
 
             return {
@@ -128,7 +139,7 @@ class MSKScraper(BaseScraper):
             }
 
         except Exception as e:
-            print(f"❌ MSK Error: {e}")
+            print(f"❌ MSK Parse Error: {e}")
             return None
         
 
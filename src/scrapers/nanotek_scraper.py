@@ -1,8 +1,10 @@
 from src.scrapers.base_scraper import BaseScraper
+from src.scrapers.resilience import FetchError, CircuitOpen
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import re
+from bs4 import BeautifulSoup
 
 class NanotekScraper(BaseScraper):
     def __init__(self):
@@ -40,40 +42,51 @@ class NanotekScraper(BaseScraper):
             print(f"❌ Error scanning category: {e}")
             return []    
 
-    def scrape_product(self, product_url: str) -> dict | None:
-        self.setup_driver() 
-        if not self.driver: return None
+    def _render(self, product_url):
+        self.setup_driver()
+        with self.timed('fetch'):
+            self.driver.get(product_url)
+        wait = WebDriverWait(self.driver, 10)
+        #the title and price are rendered client side
+        with self.timed('render_wait'):
+            wait.until(EC.presence_of_all_elements_located((By.TAG_NAME, "h1")))
+        return self.driver.page_source
+
+    def fetch_product(self, product_url: str) -> str | None:
+        try:
+            return self.guarded(product_url, self._render)
+        except CircuitOpen:
+            raise
+        except FetchError as e:
+            print(f"❌ Selenium Error for {e}")
+            return None
+
+    def parse_product(self, html: str, product_url: str) -> dict | None:
+        soup = BeautifulSoup(html, 'html.parser')
 
         try:
-            self._polite_delay()
-            self.driver.get(product_url)
-            wait = WebDriverWait(self.driver, 10)
-            
             #Name Extraction
-            #Get ALL h1 elements
-            h1s = wait.until(EC.presence_of_all_elements_located((By.TAG_NAME, "h1")))
-            
-            #Pick the first one that is NOT "0" and is long enough to be a product name
+            #Pick the first h1 that is NOT "0" and is long enough to be a product name
             name = "Unknown Product"
-            for h in h1s:
-                text = h.text.strip()
+            for h in soup.find_all("h1"):
+                text = h.get_text(strip=True)
                 # If text is longer than 3 chars and isn't a digit (like "0"), it's the title
                 if len(text) > 3 and not text.isdigit():
                     name = text
                     break
 
+            #first element whose class mentions price or whose own text has "Rs."
+            price_element = soup.find(lambda tag: 'price' in ' '.join(tag.get('class', []))
+                                      or any('Rs.' in t for t in tag.find_all(string=True, recursive=False)))
             try:
-                price_element = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, "//*[contains(@class, 'price') or contains(text(), 'Rs.')]")
-                ))
-                price_text = price_element.text
+                price_text = price_element.get_text("\n", strip=True)
                 first_price_found = price_text.split('\n')[0]
                 clean_price = float(re.sub(r'[^\d.]', '', first_price_found))
             except Exception:
                 print(f"⚠️ Price parsing failed for {product_url}")
                 return None
 
-            page_content = self.driver.page_source.lower()
+            page_content = html.lower()
             stock_status = "in stock" in page_content and "out of stock" not in page_content
 
             return {
@@ -85,7 +98,7 @@ class NanotekScraper(BaseScraper):
             }
 
         except Exception as e:
-            print(f"❌ Selenium Error for {product_url}: {e}")
+            print(f"❌ Parse Error for {product_url}: {e}")
             return None
         
 
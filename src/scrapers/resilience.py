@@ -0,0 +1,136 @@
+import os
+import random
+import threading
+import time
+
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "2"))
+BACKOFF_BASE_SECONDS = float(os.getenv("FETCH_BACKOFF_BASE", "2.0"))
+BACKOFF_CAP_SECONDS = float(os.getenv("FETCH_BACKOFF_CAP", "30.0"))
+CIRCUIT_FAILURES = int(os.getenv("CIRCUIT_FAILURES", "3"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "120"))
+
+#error classes
+TRANSIENT = 'transient'   # timeouts, dropped connections, 5xx: retry
+THROTTLED = 'throttled'   # 403/429: retry after a longer wait
+BROWSER = 'browser'       # the webdriver itself broke: restart it, then retry
+PERMANENT = 'permanent'   # 404/410, bad input: the site answered, do not retry
+
+UNKNOWN = 'unknown'       # anything else: not retried, but counts against the vendor
+
+RETRYABLE = (TRANSIENT, THROTTLED, BROWSER)
+
+#exception class name -> kind, looked up along the exception's MRO (most specific first)
+#so subclasses such as requests' SSLError/ProxyError inherit their base's kind
+ERROR_KINDS = {
+    #requests
+    'InvalidURL': PERMANENT, 'MissingSchema': PERMANENT, 'InvalidSchema': PERMANENT,
+    'InvalidHeader': PERMANENT, 'TooManyRedirects': PERMANENT,
+    'Timeout': TRANSIENT, 'ConnectionError': TRANSIENT, 'ChunkedEncodingError': TRANSIENT,
+    'ContentDecodingError': TRANSIENT, 'RequestException': TRANSIENT,
+    #selenium: element lookups mean the page answered, anything else means the driver broke
+    'TimeoutException': TRANSIENT,
+    'NoSuchElementException': PERMANENT, 'StaleElementReferenceException': PERMANENT,
+    'InvalidSelectorException': PERMANENT, 'InvalidArgumentException': PERMANENT,
+    'WebDriverException': BROWSER,
+    #builtins: refused, reset, DNS and socket timeouts are all OSErrors
+    'TimeoutError': TRANSIENT, 'OSError': TRANSIENT,
+}
+
+class FetchError(Exception):
+    def __init__(self, kind, message):
+        super().__init__(message)
+        self.kind = kind
+
+
+#raised instead of fetching while the vendor's breaker is open
+class CircuitOpen(FetchError):
+    def __init__(self, vendor, retry_in):
+        super().__init__('circuit_open', f"{vendor} circuit open, next probe in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+#selenium is matched by class name so this module never imports it
+def classify_error(error):
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None:
+        if status in (403, 429):
+            return THROTTLED
+        if status >= 500:
+            return TRANSIENT
+        return PERMANENT
+
+    #urllib3 errors only reach us raw from selenium's link to chromedriver
+    #(requests wraps its own), which means the driver died or hung
+    if type(error).__module__.split('.')[0] == 'urllib3':
+        return BROWSER
+    for cls in type(error).__mro__:
+        kind = ERROR_KINDS.get(cls.__name__)
+        if kind:
+            return kind
+    return UNKNOWN
+
+#"full jitter" exponential backoff; throttling waits four times longer
+def backoff_seconds(attempt, kind=TRANSIENT):
+    ceiling = min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    if kind == THROTTLED:
+        ceiling = min(BACKOFF_CAP_SECONDS, ceiling * 4)
+    return random.uniform(0, ceiling)
+
+
+#closed -> open after `failure_threshold` consecutive failed URLs
+#open -> half_open once `reset_seconds` have passed; one probe is let through
+#half_open -> closed on success, back to open (timer restarted) on failure
+class CircuitBreaker:
+    def __init__(self, vendor, failure_threshold=CIRCUIT_FAILURES, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.vendor = vendor
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def retry_in(self):
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self):
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and self.retry_in() == 0:
+                self.state = 'half_open'
+                print(f"🟡 {self.vendor} circuit half-open, probing")
+            if self.state == 'half_open' and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != 'closed':
+                print(f"🟢 {self.vendor} recovered, circuit closed")
+            self.state, self.failures, self.probing = 'closed', 0, False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                print(f"🔴 {self.vendor} circuit open after {self.failures} failures, "
+                      f"pausing {self.reset_seconds:.0f}s")
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+#one breaker per vendor, shared by every scraper instance in the process
+def breaker_for(vendor):
+    with _breakers_lock:
+        if vendor not in _breakers:
+            _breakers[vendor] = CircuitBreaker(vendor)
+        return _breakers[vendor]
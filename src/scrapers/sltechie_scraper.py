@@ -1,8 +1,10 @@
 from src.scrapers.base_scraper import BaseScraper
+from src.scrapers.resilience import FetchError, CircuitOpen
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import re
+from bs4 import BeautifulSoup
 import time
 
 class SLTechieScraper(BaseScraper):
@@ -40,49 +42,54 @@ class SLTechieScraper(BaseScraper):
             print(f"❌ Error scanning category: {e}")
             return []    
 
-    def scrape_product(self, product_url: str) -> dict | None:
+    def _render(self, product_url):
         #Retrieve the shared browser
         self.setup_driver()
-        
-        if not self.driver:
-            return None
-        
-        try:
-            #Ethical Delay
-            self._polite_delay()
 
-            #Use self.driver
+        #Use self.driver
+        with self.timed('fetch'):
             self.driver.get(product_url)
-            wait = WebDriverWait(self.driver, 20)
+        with self.timed('render_wait'):
             time.sleep(5) 
+        return self.driver.page_source
+
+    def fetch_product(self, product_url: str) -> str | None:
+        #Ethical Delay and retries are handled by guarded()
+        try:
+            return self.guarded(product_url, self._render)
+        except CircuitOpen:
+            raise
+        except FetchError as e:
+            print(f"❌ SL Techie Error: {e}")
+            return None
 
+    def parse_product(self, html: str, product_url: str) -> dict | None:
+        soup = BeautifulSoup(html, 'html.parser')
+
+        try:
             #Extract Name
             name = "Unknown Product"
-            try:
-                name_elem = self.driver.find_element(By.CSS_SELECTOR, "h1.product_title")
-                name = name_elem.text.strip()
-            except:
-                try:
-                    h1s = self.driver.find_elements(By.TAG_NAME, "h1")
-                    for h in h1s:
-                        if len(h.text) > 5:
-                            name = h.text.strip()
-                            break
-                except:
-                    pass
+            name_elem = soup.select_one("h1.product_title")
+            if name_elem:
+                name = name_elem.get_text(strip=True)
+            else:
+                for h in soup.find_all("h1"):
+                    if len(h.get_text()) > 5:
+                        name = h.get_text(strip=True)
+                        break
 
             #Extract Price
             price = None
             try:
-                all_prices = self.driver.find_elements(By.CSS_SELECTOR, ".woocommerce-Price-amount")
+                all_prices = soup.select(".woocommerce-Price-amount")
                 
                 for elem in all_prices:
-                    parent_html = elem.find_element(By.XPATH, "..").get_attribute("outerHTML") or ""
+                    parent_html = str(elem.parent) if elem.parent else ""
                     
                     if "<del" in parent_html or "line-through" in parent_html:
                         continue
                     
-                    price_text = elem.get_attribute("textContent") or ""
+                    price_text = elem.get_text() or ""
                     clean_price_str = re.sub(r'[^\d.]', '', price_text)
                     
                     if clean_price_str:
@@ -95,12 +102,14 @@ class SLTechieScraper(BaseScraper):
 
             #Extract Stock Status
             is_in_stock = False
-            try:
-                stock_elem = self.driver.find_element(By.CLASS_NAME, "product-availability")
-                if "ONLINE" in stock_elem.text.upper() or "STOCK" in stock_elem.text.upper():
+            stock_elem = soup.find(class_="product-availability")
+            if stock_elem:
+                stock_text = stock_elem.get_text().upper()
+                if "ONLINE" in stock_text or "STOCK" in stock_text:
                     is_in_stock = True
-            except:
-                page_text = self.driver.find_element(By.TAG_NAME, "body").text.upper()
+            else:
+                body = soup.find("body")
+                page_text = (body or soup).get_text().upper()
                 if "ONLINE EXCLUSIVE" in page_text or "IN STOCK" in page_text:
                     is_in_stock = True
 
@@ -113,7 +122,7 @@ class SLTechieScraper(BaseScraper):
             }
 
         except Exception as e:
-            print(f"❌ SL Techie Error: {e}")
+            print(f"❌ SL Techie Parse Error: {e}")
             return None
         
 
@@ -0,0 +1,123 @@
+import argparse
+import gzip
+import hashlib
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+MANIFEST_FILE = "manifest.jsonl"
+
+
+def scraper_target(scraper):
+    cls = type(scraper)
+    return f"{cls.__module__}:{cls.__name__}"
+
+
+def load_scraper(target):
+    module_name, class_name = target.split(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+#gzip-compressed product pages addressed by sha256, plus an append-only manifest
+#one manifest line per recorded fetch: url, scraper, sha256, size and the parse
+#result at record time (the expected output when replaying)
+class SnapshotStore:
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        self.lock = threading.Lock()
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html.gz")
+
+    def put(self, scraper, url, html, parsed=None):
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        #identical pages are stored once
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+        entry = {'url': url, 'vendor': scraper.vendor_name, 'scraper': scraper_target(scraper),
+                 'sha256': digest, 'bytes': len(data), 'recorded_at': time.time(), 'parsed': parsed}
+        with self.lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def load(self, digest):
+        with gzip.open(self._object_path(digest), "rb") as f:
+            return f.read().decode('utf-8')
+
+    #manifest entries, newest recording per url unless every=True
+    def entries(self, vendor=None, every=False):
+        if not os.path.exists(self.manifest_path):
+            return []
+        found = []
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if vendor and entry['vendor'] != vendor:
+                    continue
+                found.append(entry)
+        if every:
+            return found
+        latest = {entry['url']: entry for entry in found}
+        return list(latest.values())
+
+
+#runs every archived page through its scraper's parse_product (no network)
+#yields (entry, parsed, seconds)
+def replay(store, vendor=None):
+    scrapers = {}
+    for entry in store.entries(vendor):
+        scraper = scrapers.get(entry['scraper'])
+        if scraper is None:
+            scraper = scrapers[entry['scraper']] = load_scraper(entry['scraper'])
+        html = store.load(entry['sha256'])
+        start = time.perf_counter()
+        parsed = scraper.parse_product(html, entry['url'])
+        yield entry, parsed, time.perf_counter() - start
+
+
+#fields whose replayed value differs from the one recorded
+def diff_parsed(expected, actual):
+    if expected is None or actual is None:
+        return [] if expected == actual else ['<result>']
+    return [k for k in expected if expected.get(k) != actual.get(k)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay archived product pages through the scrapers' parsers")
+    parser.add_argument("--vendor", help="only replay this vendor (e.g. Nanotek)")
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help="snapshot archive directory")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.root)
+    total = changed = 0
+    for entry, parsed, _ in replay(store, args.vendor):
+        total += 1
+        fields = diff_parsed(entry['parsed'], parsed)
+        if fields:
+            changed += 1
+            print(f"❌ {entry['vendor']} {entry['url']}: {', '.join(fields)} changed")
+            for field in fields:
+                if field != '<result>':
+                    print(f"      {field}: {entry['parsed'][field]!r} -> {parsed.get(field)!r}")
+
+    if not total:
+        print(f"⚠️ No snapshots in {args.root} (record some with SNAPSHOT_MODE=record python main.py)")
+    else:
+        print(f"{'✅' if not changed else '⚠️'} Replayed {total} pages, {changed} parse differently than when recorded")
+    sys.exit(1 if changed else 0)